@@ -1,17 +1,47 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from flask import Flask, request, render_template, session, redirect, url_for, flash
+from flask import (
+    Flask,
+    request,
+    render_template,
+    session,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+    Response,
+    make_response,
+    stream_with_context,
+)
 from slack_bolt import App
 from slack_bolt.adapter.flask import SlackRequestHandler
 from database_helpers import (
-    fetch_all_entries,
+    fetch_entries_page,
+    search_entries,
+    HIGHLIGHT_START,
+    HIGHLIGHT_STOP,
+    DEFAULT_PAGE_SIZE,
     delete_entry as db_delete_entry,
     fetch_single_entry,
     update_entry,
     fetch_all_projects,
+    pool_stats,
+    start_project_listener,
+    get_connection,
+    fetch_notebook_version,
 )
+from client_functions import iter_json
+from job_queue import background_jobs
+from user_directory import warm_user_directory, user_cache_stats
+from ftc_scout_api import response_cache as ftc_response_cache
+from http_client import latency_stats
+from google_sheets_client import build_team_index
+from sheet_spool import sheet_appends
 from functools import wraps
+from markupsafe import Markup, escape
+from werkzeug.http import is_resource_modified
+from cache import TTLCache
 
 # Load environment variables
 env_path = Path(".") / ".env"
@@ -37,6 +67,15 @@ from slack_events import register_events
 register_commands(app)
 register_events(app)
 
+# Fill the user name cache off the request path so the first submissions hit it.
+background_jobs.submit(warm_user_directory, app.client)
+# Likewise for the /scout team typeahead.
+background_jobs.submit(build_team_index)
+# Warm the project name cache and keep it in sync with other workers.
+start_project_listener()
+# Send any sheet rows spooled before the last restart.
+sheet_appends.start()
+
 
 # --- Authentication Decorator ---
 def login_required(f):
@@ -74,18 +113,133 @@ def login():
     return render_template("login.html", error=error)
 
 
+@flask_app.template_filter("highlight")
+def highlight(snippet):
+    """Escapes a search snippet and marks up the words that matched."""
+    return Markup(
+        str(escape(snippet))
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+# Query parameters /entries narrows the notebook by; see fetch_entries_page.
+ENTRY_FILTERS = ("tags", "project", "author", "creator", "since", "until")
+
+# Rendered table rows by entry ID, each stored with the entry it was rendered
+# from. A row is only reused for an identical entry, so edits made through
+# another worker are picked up; edits and deletes here drop theirs at once.
+_entry_rows = TTLCache(
+    maxsize=int(os.environ.get("ENTRY_ROW_CACHE_SIZE", 2000)),
+    ttl=int(os.environ.get("ENTRY_ROW_CACHE_TTL", 3600)),
+)
+
+# Goes into the /entries ETag so that a deploy changing the page's markup
+# is not answered with 304s for pages rendered by the old templates.
+_ENTRIES_TEMPLATES_STAMP = int(
+    max(
+        os.path.getmtime(os.path.join(flask_app.root_path, "templates", name))
+        for name in ("entries.html", "_entry_row.html")
+    )
+)
+
+
+def render_entry_row(entry):
+    """Renders one row of the entries table, reusing the cached fragment if unchanged."""
+    if "snippet" in entry:
+        # Search snippets depend on the query, so those rows are not cached.
+        return Markup(render_template("_entry_row.html", entry=entry))
+    cached = _entry_rows.get(entry["id"])
+    if cached and cached[0] == entry:
+        return cached[1]
+    row = Markup(render_template("_entry_row.html", entry=entry))
+    _entry_rows.set(entry["id"], (entry, row))
+    return row
+
+
 @flask_app.route("/entries")
 @login_required
 def view_entries():
-    all_entries = fetch_all_entries()
-    entry_count = len(all_entries)
-    return render_template("entries.html", entries=all_entries, entry_count=entry_count)
+    # The page only changes when the notebook does, so a browser that already
+    # has this version is answered from the watermark alone. Pages carrying
+    # flashed messages are one-offs and are never validated.
+    version = None if session.get("_flashes") else fetch_notebook_version()
+    if version:
+        etag = f"{version[0]}-{_ENTRIES_TEMPLATES_STAMP}"
+        if not is_resource_modified(
+            request.environ, etag=etag, last_modified=version[1]
+        ):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.last_modified = version[1]
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+    page_size = request.args.get("page_size", DEFAULT_PAGE_SIZE, type=int)
+    query = request.args.get("q", "").strip()
+    match = request.args.get("match", "any")
+    sort_by = request.args.get("sort_by", "timestamp")
+    sort_order = request.args.get("sort_order", "desc")
+    # Active filters, carried through the pagination and sort links.
+    if query:
+        filters = {"q": query}
+    else:
+        filters = {
+            name: request.args[name].strip()
+            for name in ENTRY_FILTERS
+            if request.args.get(name, "").strip()
+        }
+        if "tags" in filters:
+            filters["match"] = match
+    try:
+        if query:
+            page = search_entries(
+                query, limit=page_size, cursor=request.args.get("cursor")
+            )
+        else:
+            page = fetch_entries_page(
+                cursor=request.args.get("cursor"),
+                page_size=page_size,
+                direction=request.args.get("dir", "next"),
+                tags=filters.get("tags", "").split(","),
+                match=match,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                project=filters.get("project"),
+                author=filters.get("author"),
+                creator=filters.get("creator"),
+                since=filters.get("since"),
+                until=filters.get("until"),
+            )
+    except ValueError:
+        return redirect(url_for("view_entries", page_size=page_size))
+    response = make_response(
+        render_template(
+            "entries.html",
+            rows=[render_entry_row(entry) for entry in page["entries"]],
+            next_cursor=page["next_cursor"],
+            prev_cursor=page.get("prev_cursor"),
+            page_size=page_size,
+            filters=filters,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            projects=fetch_all_projects(),
+        )
+    )
+    if version:
+        response.set_etag(etag, weak=True)
+        response.last_modified = version[1]
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 @flask_app.route("/delete/<int:entry_id>", methods=["POST"])
 @login_required
 def delete_entry_route(entry_id):
     db_delete_entry(entry_id)
+    _entry_rows.delete(entry_id)
     flash("Entry successfully deleted.", "success")
     return redirect(url_for("view_entries"))
 
@@ -111,10 +265,48 @@ def update_entry_route(entry_id):
         "project_name": request.form["project_name"],
     }
     update_entry(entry_id, updated_data)
+    _entry_rows.delete(entry_id)
     flash("Entry successfully updated.", "success")
     return redirect(url_for("view_entries"))
 
 
+@flask_app.route("/export.json")
+@login_required
+def export_json():
+    """Streams the whole notebook as JSON, grouped by project."""
+
+    def generate():
+        with get_connection() as conn:
+            yield from iter_json(conn)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/json",
+        headers={"Content-Disposition": "attachment; filename=notebook.json"},
+    )
+
+
+@flask_app.route("/status")
+@login_required
+def status():
+    return jsonify(
+        db_pool=pool_stats(),
+        job_queue=background_jobs.stats(),
+        user_cache=user_cache_stats(),
+        ftc_cache=ftc_response_cache.stats(),
+        http_latency=latency_stats(),
+        sheet_spool=sheet_appends.stats(),
+        entry_row_cache=_entry_rows.stats(),
+    )
+
+
+@flask_app.route("/status/replay-sheet-rows", methods=["POST"])
+@login_required
+def replay_sheet_rows():
+    """Puts dead-lettered spreadsheet rows back in the spool, optionally for one target."""
+    return jsonify(replayed=sheet_appends.replay_dead_rows(request.form.get("target")))
+
+
 @flask_app.route("/logout")
 def logout():
     session.pop("logged_in", None)
@@ -0,0 +1,217 @@
+import argparse
+import re
+import time
+from database_helpers import connect_from_env, DEFAULT_PAGE_SIZE
+from client_functions import EXPORT_SQL
+
+# Every entry with its projects, authors and images, aggregated from the base
+# tables the way the notebook was read before entry_summary existed: the
+# junction tables joined side by side and collapsed again with DISTINCT.
+JOINED_ENTRIES_SQL = """
+    SELECT e.entry_id, e.entry_data, e.creator_name, e.created_at,
+           string_agg(DISTINCT p.project_name, ', ' ORDER BY p.project_name),
+           array_agg(DISTINCT u.user_name) FILTER (WHERE u.user_name IS NOT NULL),
+           array_agg(DISTINCT i.img_data) FILTER (WHERE i.img_data IS NOT NULL)
+    FROM entries e
+    LEFT JOIN project_entries pe ON e.entry_id = pe.entry_id
+    LEFT JOIN projects p ON pe.project_id = p.project_id
+    LEFT JOIN entry_author ea ON e.entry_id = ea.entry_id
+    LEFT JOIN users u ON ea.user_id = u.user_id
+    LEFT JOIN entry_imgs ei ON e.entry_id = ei.entry_id
+    LEFT JOIN img i ON ei.img_id = i.img_id
+    GROUP BY e.entry_id
+    ORDER BY e.created_at DESC, e.entry_id DESC;
+"""
+
+# The same rows as the web viewer reads them (see fetch_entries_page).
+SUMMARY_ENTRIES_SQL = """
+    SELECT entry_id, entry_data, creator_name, created_at, project_name,
+           authors, images
+    FROM entry_summary
+    ORDER BY created_at DESC, entry_id DESC;
+"""
+
+# The first page of /entries, the read the viewer makes most often.
+FIRST_PAGE_SQL = f"""
+    SELECT entry_id, entry_data, creator_name, created_at, created_at_display,
+           project_name, authors, images, tags
+    FROM entry_summary
+    ORDER BY created_at DESC, entry_id DESC
+    LIMIT {DEFAULT_PAGE_SIZE + 1};
+"""
+
+BENCH_SCHEMA = "entries_bench"
+TABLES = [
+    "users",
+    "projects",
+    "entries",
+    "img",
+    "tags",
+    "status_",
+    "entry_author",
+    "entry_imgs",
+    "entry_tags",
+    "project_entries",
+    "project_tags",
+    "project_status",
+    "entry_summary",
+]
+
+
+def build_synthetic_notebook(cur, entries, authors, images, projects=50, users=40):
+    """
+    Copies the notebook tables into BENCH_SCHEMA and fills them with
+    `entries` entries, each with `authors` authors and `images` images.
+    """
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA};")
+    for table in TABLES:
+        # Indexes and constraints come along; triggers and FKs do not.
+        cur.execute(
+            f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL);"
+        )
+    cur.execute(f"SET search_path = {BENCH_SCHEMA}, public;")
+    cur.execute(
+        "INSERT INTO users (user_id, user_name, user_password) "
+        "SELECT g, 'user ' || g, 'x' FROM generate_series(1, %s) g;",
+        (users,),
+    )
+    cur.execute(
+        "INSERT INTO projects (project_id, project_name) "
+        "SELECT g, 'project ' || g FROM generate_series(1, %s) g;",
+        (projects,),
+    )
+    cur.execute(
+        """
+        INSERT INTO entries (entry_id, entry_data, creator_name, created_at)
+        SELECT g, ARRAY['did ' || md5(g::text), 'next ' || md5((-g)::text)],
+               'user ' || (1 + g %% %(users)s),
+               now() - g * interval '1 minute'
+        FROM generate_series(1, %(entries)s) g;
+        """,
+        {"entries": entries, "users": users},
+    )
+    cur.execute(
+        "INSERT INTO project_entries (project_id, entry_id) "
+        "SELECT 1 + g %% %s, g FROM generate_series(1, %s) g;",
+        (projects, entries),
+    )
+    cur.execute(
+        """
+        INSERT INTO entry_author (entry_id, user_id)
+        SELECT e, 1 + (e + a) %% %(users)s
+        FROM generate_series(1, %(entries)s) e, generate_series(1, %(authors)s) a;
+        """,
+        {"entries": entries, "authors": min(authors, users), "users": users},
+    )
+    cur.execute(
+        """
+        INSERT INTO img (img_id, img_name, img_data)
+        SELECT (e - 1) * %(images)s + i, 'img.png',
+               'https://files.example/' || e || '/' || i
+        FROM generate_series(1, %(entries)s) e, generate_series(1, %(images)s) i;
+        INSERT INTO entry_imgs (entry_id, img_id)
+        SELECT (img_id - 1) / %(images)s + 1, img_id FROM img;
+        """,
+        {"entries": entries, "images": images},
+    )
+    # The copied tables have no triggers, so fill the summary in one go;
+    # refresh_entry_summary resolves its tables through the search_path.
+    cur.execute("SELECT refresh_entry_summary(ARRAY(SELECT entry_id FROM entries));")
+    for table in TABLES:
+        cur.execute(f"ANALYZE {table};")
+
+
+def _normalized(rows):
+    """Rows as a sorted list, with empty/NULL arrays and array order unified."""
+    return sorted(
+        (
+            row[0],
+            tuple(row[1] or ()),
+            row[2],
+            row[3],
+            row[4] or "",
+            tuple(sorted(row[5] or ())),
+            tuple(sorted(row[6] or ())),
+        )
+        for row in rows
+    )
+
+
+def check_equivalent(cur):
+    """Reports whether entry_summary holds what the base tables aggregate to."""
+    results = []
+    for sql in (JOINED_ENTRIES_SQL, SUMMARY_ENTRIES_SQL):
+        cur.execute(sql)
+        results.append(_normalized(cur.fetchall()))
+    joined, summary = results
+    same = joined == summary
+    print(f"{len(joined)} entries; entry_summary {'matches' if same else 'DIFFERS'}.")
+    if not same:
+        for old, new in zip(joined, summary):
+            if old != new:
+                print(f"  first difference:\n    joined:  {old}\n    summary: {new}")
+                break
+    return same
+
+
+def explain(cur, label, sql):
+    """Prints EXPLAIN (ANALYZE, BUFFERS) for a query and returns its execution time."""
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+    plan = "\n".join(row[0] for row in cur.fetchall())
+    print(f"\n--- {label} ---\n{plan}")
+    return float(re.search(r"Execution Time: ([\d.]+) ms", plan).group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check entry_summary against the base tables and time the entry reads."
+    )
+    parser.add_argument(
+        "--existing",
+        action="store_true",
+        help="check the real notebook instead of building a synthetic one",
+    )
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=8)
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument(
+        "--keep", action="store_true", help=f"keep the {BENCH_SCHEMA} schema"
+    )
+    args = parser.parse_args()
+
+    conn = connect_from_env()
+    try:
+        with conn.cursor() as cur:
+            if not args.existing:
+                started = time.monotonic()
+                build_synthetic_notebook(cur, args.entries, args.authors, args.images)
+                print(
+                    f"Built {args.entries} entries x {args.authors} authors x "
+                    f"{args.images} images in {time.monotonic() - started:.1f}s."
+                )
+            same = check_equivalent(cur)
+            timings = {
+                label: explain(cur, label, sql)
+                for label, sql in [
+                    ("all entries, joined", JOINED_ENTRIES_SQL),
+                    ("all entries, entry_summary", SUMMARY_ENTRIES_SQL),
+                    ("first /entries page", FIRST_PAGE_SQL),
+                    ("JSON export", EXPORT_SQL),
+                ]
+            }
+            print()
+            for label, ms in timings.items():
+                print(f"{label}: {ms:.2f} ms")
+        if args.keep and not args.existing:
+            conn.commit()
+        else:
+            # Nothing here needs to persist; rolling back drops the bench schema.
+            conn.rollback()
+    finally:
+        conn.close()
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A thread-safe in-memory cache with a per-entry time to live and
+    least-recently-used eviction once maxsize entries are stored.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        """Stores value under key, evicting the least recently used entry if full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Returns the entry count and hit/miss counters."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class SQLiteCache:
+    """
+    A small on-disk key/value store with expiry, used as the persistent tier
+    behind a TTLCache so cached values survive restarts. Values must be JSON
+    serialisable.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # sqlite3 connections must not cross a fork, so each process opens its own.
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);"
+            )
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        """Returns (value, seconds left) for an unexpired key, or None."""
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT value, expires_at FROM cache WHERE key = ?;", (key,))
+                .fetchone()
+            )
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0]), row[1] - time.time()
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?);",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            conn.commit()
+
+
+class TieredCache:
+    """
+    Read-through cache with an LRU memory tier in front of an SQLite disk tier.
+    Tracks memory hits, disk hits and misses separately.
+    """
+
+    def __init__(self, memory, disk, ttl):
+        self.memory = memory
+        self.disk = disk
+        self.ttl = ttl
+        self.disk_hits = 0
+
+    def get(self, key):
+        """Returns the cached value from memory or disk, or None on a miss."""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        try:
+            found = self.disk.get(key)
+        except sqlite3.Error as e:
+            print(f"Disk cache read failed for {key}: {e}")
+            return None
+        if found is None:
+            return None
+        value, ttl_left = found
+        self.disk_hits += 1
+        self.memory.set(key, value, ttl=ttl_left)
+        return value
+
+    def set(self, key, value):
+        """Stores value in both tiers. None values are not cached."""
+        if value is None:
+            return
+        self.memory.set(key, value, ttl=self.ttl)
+        try:
+            self.disk.set(key, value, self.ttl)
+        except sqlite3.Error as e:
+            print(f"Disk cache write failed for {key}: {e}")
+
+    def get_or_fetch(self, key, fetch, force_refresh=False, cacheable=None):
+        """
+        Returns the cached value for key, or calls fetch() and caches its result.
+        force_refresh skips both tiers. If cacheable is given, a fetched value
+        is only stored when cacheable(value) is true.
+        """
+        if not force_refresh:
+            value = self.get(key)
+            if value is not None:
+                return value
+        value = fetch()
+        if cacheable is None or cacheable(value):
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        memory = self.memory.stats()
+        return {
+            "memory_size": memory["size"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            # A memory miss that the disk tier answered is not a real miss.
+            "misses": memory["misses"] - self.disk_hits,
+        }
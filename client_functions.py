@@ -4,15 +4,64 @@ import json
 
 # variables-----------------------------------------------------------------------------------
 
-tables = ["entries", "img", "projects", "status_", "tags", "users"]
-relations = [
-    ["entries", "entry_author", "users"],
-    ["entries", "entry_tags", "tags"],
-    ["entries", "entry_imgs", "img"],
-    ["projects", "project_entries", "entries"],
-    ["projects", "project_tags", "tags"],
-    ["projects", "project_status", "status_"],
-]
+# One row per project that has entries: (project_id, project document), where
+# a project document is
+#   {"name", "id", "tags": [tag], "status": [status], "entries": {entry_id: entry}}
+# and each entry is
+#   {"id", "creator", "users": [name], "images": [[img_name, url]], "data",
+#    "tags": [tag], "milestone"}
+# "milestone" is the lowercased text of is_milestone ("empty" when unset), as
+# the export has always written it.
+EXPORT_SQL = """
+    SELECT p.project_id,
+           json_build_object(
+               'name', p.project_name,
+               'id', p.project_id,
+               'tags', COALESCE((
+                   SELECT json_agg(t.tag_name ORDER BY t.tag_name)
+                   FROM project_tags pt JOIN tags t ON t.tag_id = pt.tag_id
+                   WHERE pt.project_id = p.project_id
+               ), '[]'),
+               'status', COALESCE((
+                   SELECT json_agg(s.status_name ORDER BY s.status_name)
+                   FROM project_status ps JOIN status_ s ON s.status_id = ps.status_id
+                   WHERE ps.project_id = p.project_id
+               ), '[]'),
+               'entries', pe.entries
+           )::text
+    FROM projects p
+    JOIN LATERAL (
+        SELECT json_object_agg(
+                   e.entry_id,
+                   json_build_object(
+                       'id', e.entry_id,
+                       'creator', e.creator_name,
+                       'users', COALESCE((
+                           SELECT json_agg(u.user_name ORDER BY u.user_name)
+                           FROM entry_author ea JOIN users u ON u.user_id = ea.user_id
+                           WHERE ea.entry_id = e.entry_id
+                       ), '[]'),
+                       'images', COALESCE((
+                           SELECT json_agg(json_build_array(i.img_name, i.img_data)
+                                           ORDER BY i.img_id)
+                           FROM entry_imgs ei JOIN img i ON i.img_id = ei.img_id
+                           WHERE ei.entry_id = e.entry_id
+                       ), '[]'),
+                       'data', e.entry_data,
+                       'tags', COALESCE((
+                           SELECT json_agg(t.tag_name ORDER BY t.tag_name)
+                           FROM entry_tags et JOIN tags t ON t.tag_id = et.tag_id
+                           WHERE et.entry_id = e.entry_id
+                       ), '[]'),
+                       'milestone', COALESCE(e.is_milestone::text, 'empty')
+                   )
+                   ORDER BY e.entry_id
+               ) AS entries
+        FROM project_entries pj JOIN entries e ON e.entry_id = pj.entry_id
+        WHERE pj.project_id = p.project_id
+    ) pe ON pe.entries IS NOT NULL
+    ORDER BY p.project_id;
+"""
 
 
 # function------------------------------------------------------------------------------------
@@ -44,37 +93,6 @@ def load_config(filename="database.ini", section="postgresql"):
     return config
 
 
-def pull_data(conn, table):
-    cur = conn.cursor()
-    command = f"SELECT column_name FROM information_schema.columns WHERE table_schema = 'public' AND table_name = '{table}';"
-    cur.execute(command)
-    return cur.fetchall()
-
-
-def clean_tuple(tuple):
-    if type(tuple) in [type([]), type(())]:
-        tuple = str(tuple)
-        for c in [
-            ["'(", "("],
-            ["None", "'empty'"],
-            [",)", ")"],
-            ["(", ""],
-            [")", ""],
-            [",,", ","],
-            [",]", "]"],
-            ["'", '"'],
-            ["False", "false"],
-            ["True", "true"],
-            ['}"', "}"],
-            ["{", '{"'],
-            ["}", '"}'],
-        ]:
-            tuple = tuple.replace(c[0], c[1])
-        return json.loads(tuple)
-    else:
-        return tuple
-
-
 def clean_design(tuple):
     if type(tuple) in [type([]), type(()), type({})]:
         tuple = str(tuple)
@@ -99,156 +117,6 @@ def clean_design(tuple):
         return tuple
 
 
-def get_columns(conn):
-    cur = conn.cursor()
-    columns = {}
-    connections = {}
-    for t in tables:
-        columns[t] = {}
-        for c in pull_data(conn, t):
-            cur.execute(f"select {clean_tuple(c)} from {t};")
-            columns[t][clean_tuple(c)] = cur.fetchall()
-    for t in relations:
-        connections[t[1]] = {}
-        for c in pull_data(conn, clean_tuple(t[1])):
-            cur.execute(f"select {clean_tuple(c)} from {t[1]};")
-            connections[t[1]][clean_tuple(c)] = cur.fetchall()
-    return columns, connections
-
-
-def pull_row(row, table, conn):
-    cur = conn.cursor()
-    for c in ["[", "]", "'"]:
-        row = row.replace(c, "")
-    cur.execute(f"SELECT {row} FROM {table}")
-    return cur.fetchall()
-
-
-def get_data_struct(conn):
-    columns, connections = get_columns(conn)
-    for column in columns:
-        for row in columns[column]:
-            columns[column][row] = pull_row(row, column, conn)
-    for column in connections:
-        for row in connections[column]:
-            connections[column][row] = pull_row(row, column, conn)
-    return columns, connections
-
-
-def get_data(data, data2, conn):
-    entries = []
-    imgs = []
-    projects = []
-    users = []
-    for t in tables:
-        match t:
-            case "entries":
-                entries.append(
-                    clean_tuple(
-                        [
-                            data[t]["entry_id"],
-                            data[t]["entry_data"],
-                            data2["entry_imgs"]["img_ids"],
-                            data2["entry_author"]["user_names"],
-                            data2["entry_tags"]["tags"],
-                            data[t]["is_milestone"],
-                            data2["entry_author"]["creator_name"],
-                        ]
-                    )
-                )
-            case "img":
-                imgs.append(
-                    clean_tuple(
-                        [data[t]["img_id"], data[t]["img_name"], data[t]["img_data"]]
-                    )
-                )
-            case "projects":
-                projects.append(
-                    clean_tuple(
-                        [
-                            data[t]["project_id"],
-                            data[t]["project_name"],
-                            data2["project_status"]["status_"],
-                            data2["project_tags"]["tags"],
-                            data2["project_entries"]["entry_ids"],
-                        ]
-                    )
-                )
-            case "users":
-                users.append(
-                    clean_tuple(
-                        [
-                            data[t]["user_id"],
-                            data[t]["user_name"],
-                            data[t]["user_password"],
-                        ]
-                    )
-                )
-    return entries, imgs, projects, users
-
-
-def getImages(id, images):
-    imgs = []
-    if len(images[0][0]) != 0 and id != "empty":
-        for e in id:
-            if e in images[0][0]:
-                imgs += [[images[0][1][e - 1], images[0][2][e - 1]]]
-    return imgs
-
-
-def gen_json(data, data2, conn):
-    final_json = ""
-    entries, imgs, projects, users = get_data(data, data2, conn)
-
-    new_projects = []
-
-    for i in range(len(data["projects"]["project_id"])):
-        temp_project = []
-        for p in projects[0]:
-            temp_project.append(p[i])
-        new_projects.append(temp_project)
-
-    for p in new_projects:
-        project_entries = ""
-        for e in entries:
-            if p[4] != "empty":
-                for i in range(len(e[0])):
-                    if e[0][i] in p[4]:
-                        project_entries += (
-                            f'"{e[0][i]}":'
-                            + str(
-                                entry_json(
-                                    e[0][i],
-                                    e[1][i],
-                                    getImages(e[2][i], imgs),
-                                    e[3][i],
-                                    e[4][i],
-                                    str(e[5][i]).lower(),
-                                    e[6][i],
-                                )
-                            )
-                            + ","
-                        )
-
-        project_entries = clean_tuple(project_entries)
-
-        if project_entries != "":
-            project_entries = "{" + project_entries[:-1] + "}"
-            project_entries = json.loads(project_entries.replace("'", '"'))
-            final_json += (
-                '"'
-                + str(p[0])
-                + '"'
-                + ":"
-                + str(project_json(p[0], p[1], p[3], p[2], project_entries)).replace(
-                    "'", '"'
-                )
-                + ","
-            )
-
-    return clean_tuple("{" + final_json[:-1] + "}")
-
-
 def convertArray(string):
     array = "{" + string + "}"
     replacements = [["{", '{"'], [",", '","'], ["}", '"}']]
@@ -323,51 +191,20 @@ def pull_design_info(conn):
     return clean_design(data)
 
 
-def filter_data(data, tags):
-    entries = {}
-    try:
-        data = json.loads(data)
-    except:
-        print("data was not in correct json format")
-        return 1
-    for project in data:
-        for entry in data[project]["entries"]:
-            for t in tags:
-                if t in data[project]["entries"][str(entry)]["tags"]:
-                    entries[str(entry)] = {
-                        "project": data[project]["name"],
-                        "entry": data[project]["entries"][str(entry)],
-                    }
-    entries = str(entries).replace("'", '"')
-    return clean_tuple(entries)
+def iter_json(conn, batch_size=50):
+    """
+    Streams the notebook export as JSON text chunks, one project at a time,
+    using a server-side cursor so the whole document is never held in memory.
+    """
+    with conn.cursor(name="notebook_export") as cur:
+        cur.itersize = batch_size
+        cur.execute(EXPORT_SQL)
+        yield "{"
+        for i, (project_id, document) in enumerate(cur):
+            yield f'{"," if i else ""}"{project_id}":{document}'
+        yield "}"
+    conn.commit()
 
 
 def extract_json(conn):
-    main_tables, relate_tables = get_data_struct(conn)
-    json1 = gen_json(main_tables, relate_tables, conn)
-    return json1
-
-
-# JSON -----------------------------------------------------
-
-
-def project_json(id, name, tags, status, entries):
-    return {
-        "name": name,  # project name
-        "id": id,
-        "tags": tags,
-        "status": status,
-        "entries": entries,
-    }
-
-
-def entry_json(id, data, images, users, tags, milestone, creator):
-    return {
-        "id": id,
-        "creator": creator,
-        "users": users,
-        "images": images,
-        "data": data,
-        "tags": tags,
-        "milestone": milestone,
-    }
+    return "".join(iter_json(conn))
@@ -1,6 +1,65 @@
 import os
+import time
+import base64
+import bisect
+import select
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import date
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 import json
+from cache import TTLCache
+
+# --- Connection pool ---
+# The pool is created lazily and tagged with the PID that created it, so a
+# gunicorn worker forked from a parent that already touched the database
+# builds its own pool instead of sharing the parent's sockets.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# One slot per pooled connection. ThreadedConnectionPool raises PoolError as
+# soon as every connection is out, so checkouts wait here for a free slot
+# (up to DB_POOL_TIMEOUT seconds) instead of failing on a busy moment.
+_pool_slots = None
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# Connections idle for longer than this are probed before being handed out;
+# recently returned ones are trusted, so a checkout normally costs no query.
+POOL_PROBE_AFTER = float(os.environ.get("DB_POOL_PROBE_AFTER", 30))
+_idle_since = weakref.WeakKeyDictionary()
+# Pools inherited across a fork are kept referenced here: letting them be
+# garbage collected would close sockets the parent process is still using.
+_inherited_pools = []
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+TAG_MATCH_MODES = ("any", "all")
+# Sort keys the entries viewer accepts, mapped to the entry_summary column
+# (and its SQL type, for casting cursor values) that each one orders by.
+# entry_id breaks ties, and every pair has a matching index from migration 7.
+SORT_COLUMNS = {
+    "timestamp": ("created_at", "timestamptz"),
+    "id": ("entry_id", "integer"),
+    "author": ("authors", "text[]"),
+}
+SORT_ORDERS = ("asc", "desc")
+
+# --- Project name cache ---
+# Sorted project names kept in memory so modal opens never wait on Postgres.
+# Writers that create a project NOTIFY this channel; every process LISTENs on
+# it and reloads, which keeps gunicorn workers in step with each other.
+PROJECTS_CHANNEL = "projects_changed"
+_project_names = None
+_project_names_lock = threading.Lock()
+_listener_pid = None
+
+# Typeahead results by normalised query, dropped whenever the project list changes.
+PROJECT_SEARCH_LIMIT = 20
+_project_search_cache = TTLCache(
+    maxsize=int(os.environ.get("PROJECT_SEARCH_CACHE_SIZE", 256)),
+    ttl=int(os.environ.get("PROJECT_SEARCH_CACHE_TTL", 300)),
+)
 
 
 def connect_from_env():
@@ -19,180 +78,711 @@ def connect_from_env():
         raise error
 
 
-def get_or_create_user_id(cursor, user_name):
-    """Finds or creates a user and returns their ID."""
-    cursor.execute("SELECT user_id FROM users WHERE user_name = %s;", (user_name,))
-    result = cursor.fetchone()
-    if result:
-        return result[0]
-    else:
-        cursor.execute(
-            "INSERT INTO users (user_name, user_password) VALUES (%s, %s) RETURNING user_id;",
-            (user_name, "default_pass"),
-        )
-        return cursor.fetchone()[0]
+def get_pool():
+    """Returns this process's connection pool, creating it on first use."""
+    global _pool, _pool_pid, _pool_slots
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+            _pool = ThreadedConnectionPool(
+                int(os.environ.get("DB_POOL_MIN", 1)),
+                int(os.environ.get("DB_POOL_MAX", 10)),
+                host=os.environ.get("DB_HOST"),
+                dbname=os.environ.get("DB_NAME"),
+                user=os.environ.get("DB_USER"),
+                password=os.environ.get("DB_PASS"),
+                sslmode="require",
+            )
+            _pool_slots = threading.BoundedSemaphore(_pool.maxconn)
+            _pool_pid = pid
+    return _pool
+
+
+def _is_healthy(conn):
+    """
+    Checks that a pooled connection is still usable. Only connections idle
+    past POOL_PROBE_AFTER are probed, with one autocommit SELECT 1.
+    """
+    if conn.closed:
+        return False
+    idle_since = _idle_since.get(conn)
+    if idle_since is not None and time.monotonic() - idle_since < POOL_PROBE_AFTER:
+        return True
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.autocommit = False
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextmanager
+def get_connection():
+    """
+    Checks a healthy connection out of the pool and returns it afterwards.
+    Waits up to POOL_TIMEOUT seconds for a free connection, then raises
+    psycopg2.pool.PoolError.
+    """
+    pool = get_pool()
+    slots = _pool_slots
+    if not slots.acquire(timeout=POOL_TIMEOUT):
+        raise PoolError(f"No database connection free after {POOL_TIMEOUT}s")
+    try:
+        conn = pool.getconn()
+        # A server restart or idle timeout can leave every idle connection
+        # dead, so keep discarding until one passes or the pool opens a
+        # fresh one.
+        for _ in range(pool.maxconn):
+            if _is_healthy(conn):
+                break
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed and conn.status != psycopg2.extensions.STATUS_READY:
+                conn.rollback()
+            _idle_since[conn] = time.monotonic()
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+
+@contextmanager
+def transaction():
+    """Yields a cursor inside a transaction that commits on success and rolls back on error."""
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def pool_stats():
+    """Returns the configured size and the idle/in-use counts of the pool."""
+    pool = get_pool()
+    with pool._lock:
+        return {
+            "min": pool.minconn,
+            "max": pool.maxconn,
+            "idle": len(pool._pool),
+            "in_use": len(pool._used),
+            "timeout": POOL_TIMEOUT,
+        }
 
 
 def get_or_create_project_id(cursor, project_name):
-    """Finds or creates a project and returns its ID."""
+    """
+    Finds or creates a project in one statement and returns its ID and
+    whether it was created. A newly created project is announced to the
+    project name caches.
+    """
     cursor.execute(
-        "SELECT project_id FROM projects WHERE project_name = %s;", (project_name,)
-    )
-    result = cursor.fetchone()
-    if result:
-        return result[0]
-    else:
-        cursor.execute(
-            "INSERT INTO projects (project_name) VALUES (%s) RETURNING project_id;",
-            (project_name,),
+        """
+        WITH new_project AS (
+            INSERT INTO projects (project_name) VALUES (%(name)s)
+            ON CONFLICT (project_name) DO NOTHING
+            RETURNING project_id
         )
-        return cursor.fetchone()[0]
+        SELECT project_id, true FROM new_project
+        UNION ALL
+        SELECT project_id, false FROM projects WHERE project_name = %(name)s;
+    """,
+        {"name": project_name},
+    )
+    project_id, created = cursor.fetchone()
+    if created:
+        notify_projects_changed(cursor)
+    return project_id, created
+
+
+def bump_notebook_version(cursor):
+    """
+    Advances the notebook version watermark inside the caller's transaction.
+    Every write to entries goes through here, so readers can tell from one
+    row whether anything changed. The row lock queues concurrent writers
+    until commit, which keeps versions and timestamps in commit order.
+    """
+    cursor.execute("""
+        UPDATE notebook_version
+        SET version = version + 1,
+            updated_at = greatest(updated_at, clock_timestamp())
+        RETURNING version;
+    """)
+    return cursor.fetchone()[0]
 
 
-def enter_data(data, client, submitting_user):
-    """Inserts a new entry into the database using a dictionary of data."""
-    conn = None
+def fetch_notebook_version():
+    """
+    Returns (version, updated_at) of the last notebook write, or None on
+    error. The read runs in autocommit, so it is a single round trip with
+    no BEGIN or COMMIT around it.
+    """
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
-            all_user_names = set(
-                data.get("selected_users", []) + [data.get("submitting_user")]
-            )
-            user_id_map = {
-                name: get_or_create_user_id(cur, name) for name in all_user_names
-            }
+        with get_connection() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT version, updated_at FROM notebook_version;")
+                    return cur.fetchone()
+            finally:
+                conn.autocommit = False
+    except Exception as e:
+        print(f"An error occurred while fetching the notebook version: {e}")
+        return None
 
-            project_id = get_or_create_project_id(cur, data["project_name"])
 
-            entry_data_pg = [data.get("what_did", ""), data.get("what_next", "")]
-            cur.execute(
-                "INSERT INTO entries (entry_data, creator_name) VALUES (%s, %s) RETURNING entry_id;",
-                (entry_data_pg, data.get("submitting_user")),
-            )
-            entry_id = cur.fetchone()[0]
+# Writes a whole submission in one round trip. Users and the project are
+# upserted with ON CONFLICT DO NOTHING; the existing rows are read back from
+# the statement's snapshot, so RETURNING plus the SELECT covers both cases.
+ENTER_DATA_SQL = """
+    WITH input_users AS (
+        SELECT DISTINCT unnest(%(user_names)s::text[]) AS user_name
+    ),
+    new_users AS (
+        INSERT INTO users (user_name, user_password)
+        SELECT user_name, 'default_pass' FROM input_users
+        ON CONFLICT (user_name) DO NOTHING
+        RETURNING user_id, user_name
+    ),
+    all_users AS (
+        SELECT user_id, user_name FROM new_users
+        UNION ALL
+        SELECT u.user_id, u.user_name FROM users u JOIN input_users USING (user_name)
+    ),
+    new_project AS (
+        INSERT INTO projects (project_name) VALUES (%(project_name)s)
+        ON CONFLICT (project_name) DO NOTHING
+        RETURNING project_id
+    ),
+    project AS (
+        SELECT project_id FROM new_project
+        UNION ALL
+        SELECT project_id FROM projects WHERE project_name = %(project_name)s
+    ),
+    new_entry AS (
+        INSERT INTO entries (entry_data, creator_name)
+        VALUES (%(entry_data)s, %(creator_name)s)
+        RETURNING entry_id
+    ),
+    new_authors AS (
+        INSERT INTO entry_author (entry_id, user_id)
+        SELECT DISTINCT new_entry.entry_id, all_users.user_id
+        FROM new_entry, all_users
+        WHERE all_users.user_name = ANY(%(author_names)s::text[])
+    ),
+    new_imgs AS (
+        INSERT INTO img (img_name, img_data)
+        SELECT * FROM unnest(%(img_names)s::text[], %(img_urls)s::text[])
+        RETURNING img_id
+    ),
+    new_entry_imgs AS (
+        INSERT INTO entry_imgs (entry_id, img_id)
+        SELECT new_entry.entry_id, new_imgs.img_id FROM new_entry, new_imgs
+    ),
+    new_project_entry AS (
+        INSERT INTO project_entries (project_id, entry_id)
+        SELECT project.project_id, new_entry.entry_id FROM project, new_entry
+    )
+    SELECT (SELECT entry_id FROM new_entry),
+           (SELECT count(*) FROM all_users),
+           (SELECT count(*) FROM project),
+           (SELECT count(*) FROM new_project);
+"""
 
-            author_ids = [user_id_map[name] for name in data.get("selected_users", [])]
-            for user_id in author_ids:
-                cur.execute(
-                    "INSERT INTO entry_author (entry_id, user_id) VALUES (%s, %s);",
-                    (entry_id, user_id),
-                )
 
-            for file_info in data.get("files", []):
-                cur.execute(
-                    "INSERT INTO img (img_name, img_data) VALUES (%s, %s) RETURNING img_id;",
-                    (file_info.get("file_name"), file_info.get("file_url")),
-                )
-                img_id = cur.fetchone()[0]
-                cur.execute(
-                    "INSERT INTO entry_imgs (entry_id, img_id) VALUES (%s, %s);",
-                    (entry_id, img_id),
-                )
+class ConcurrentWriteError(RuntimeError):
+    """A user or project was created by another submission mid-insert; retry."""
+
+
+# Failures of enter_data that can succeed when simply tried again.
+TRANSIENT_DB_ERRORS = (psycopg2.OperationalError, PoolError, ConcurrentWriteError)
+
 
+def enter_data(data, client=None, submitting_user=None):
+    """
+    Inserts a new entry into the database using a dictionary of data.
+    Returns the new entry's ID, which doubles as the notebook entry number.
+    If a Slack client is given, a failure is also posted to the notebook
+    channel; queued submissions leave that to their job's on_failure.
+    """
+    try:
+        with transaction() as cur:
+            selected_users = data.get("selected_users", [])
+            all_user_names = set(selected_users + [data.get("submitting_user")])
+            files = data.get("files", [])
             cur.execute(
-                "INSERT INTO project_entries (project_id, entry_id) VALUES (%s, %s);",
-                (project_id, entry_id),
+                ENTER_DATA_SQL,
+                {
+                    "user_names": list(all_user_names),
+                    "author_names": selected_users,
+                    "project_name": data["project_name"],
+                    "entry_data": [data.get("what_did", ""), data.get("what_next", "")],
+                    "creator_name": data.get("submitting_user"),
+                    "img_names": [f.get("file_name") for f in files],
+                    "img_urls": [f.get("file_url") for f in files],
+                },
             )
-            conn.commit()
+            entry_id, user_count, project_count, created_projects = cur.fetchone()
+            # A user or project committed by a concurrent submission after this
+            # statement's snapshot is neither inserted nor visible; fail so the
+            # transaction rolls back and the job can be retried.
+            if user_count != len(all_user_names) or project_count != 1:
+                raise ConcurrentWriteError(
+                    "A user or project was created concurrently; please retry."
+                )
+            bump_notebook_version(cur)
+            if created_projects:
+                notify_projects_changed(cur)
+        if created_projects:
+            _add_cached_project(data["project_name"])
+        return entry_id
     except Exception as e:
-        if conn:
-            conn.rollback()
         error_message = f"DB Error by {submitting_user}: Transaction rolled back.\n*Error:*\n```{e}```"
         if client:
             client.chat_postMessage(channel="#engineering-notebook", text=error_message)
         raise e
-    finally:
-        if conn:
-            conn.close()
 
 
-def fetch_all_entries():
-    """Fetches all entries and their related data for the website."""
-    conn = None
+def _encode_cursor(value, entry_id):
+    """Packs a (sort value, entry_id) keyset position into a URL-safe token."""
+    raw = json.dumps([value, entry_id], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor):
+    """Unpacks a token made by _encode_cursor; raises ValueError if it is malformed."""
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT e.entry_id, e.entry_data, e.creator_name, e.created_at, p.project_name,
-                       array_agg(DISTINCT u.user_name) FILTER (WHERE u.user_name IS NOT NULL) as authors,
-                       array_agg(DISTINCT i.img_data) FILTER (WHERE i.img_data IS NOT NULL) as images
-                FROM entries e
-                LEFT JOIN project_entries pe ON e.entry_id = pe.entry_id
-                LEFT JOIN projects p ON pe.project_id = p.project_id
-                LEFT JOIN entry_author ea ON e.entry_id = ea.entry_id
-                LEFT JOIN users u ON ea.user_id = u.user_id
-                LEFT JOIN entry_imgs ei ON e.entry_id = ei.entry_id
-                LEFT JOIN img i ON ei.img_id = i.img_id
-                GROUP BY e.entry_id, p.project_name
-                ORDER BY e.created_at DESC;
-            """)
+        value, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(entry_id)
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+
+
+def _tag_filter(tags, match):
+    """
+    Builds the WHERE condition for a tag filter on entry_summary.tags, which
+    entry_summary_tags_idx (GIN) serves for both modes. With match="all" an
+    entry must carry every tag, otherwise any one of them.
+    """
+    if match not in TAG_MATCH_MODES:
+        raise ValueError(f"Unknown tag match mode: {match!r}")
+    operator = "@>" if match == "all" else "&&"
+    return f"e.tags {operator} %s::text[]", [tags]
+
+
+def _parse_date(value):
+    """A YYYY-MM-DD filter bound as a date, or None; raises ValueError if malformed."""
+    return date.fromisoformat(value.strip()) if value and value.strip() else None
+
+
+def fetch_entries_page(
+    cursor=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    direction="next",
+    tags=None,
+    match="any",
+    sort_by="timestamp",
+    sort_order="desc",
+    project=None,
+    author=None,
+    creator=None,
+    since=None,
+    until=None,
+):
+    """
+    Fetches one page of entries from entry_summary using keyset pagination
+    on (sort column, entry_id), newest first by default. sort_by is a key of
+    SORT_COLUMNS and sort_order "asc" or "desc". Only entries matching every
+    given filter are returned: tags (any of them, or with match="all" every
+    one), the exact project, an author, the creator, and a created_at date
+    range from since to until, both inclusive. Unknown sort keys or orders
+    and malformed dates or cursors raise ValueError. Returns the entries
+    plus next/prev cursors (None at the ends).
+    """
+    if sort_by not in SORT_COLUMNS or sort_order not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort: {sort_by!r} {sort_order!r}")
+    column, cast = SORT_COLUMNS[sort_by]
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    backwards = direction == "prev" and cursor is not None
+    conditions = []
+    params = []
+    tags = list(dict.fromkeys(t.strip() for t in tags or [] if t.strip()))
+    if tags:
+        condition, condition_params = _tag_filter(tags, match)
+        conditions.append(condition)
+        params += condition_params
+    if project:
+        conditions.append("e.project_name = %s")
+        params.append(project)
+    if author:
+        conditions.append("e.authors @> ARRAY[%s]::text[]")
+        params.append(author)
+    if creator:
+        conditions.append("e.creator_name = %s")
+        params.append(creator)
+    since, until = _parse_date(since), _parse_date(until)
+    if since:
+        conditions.append("e.created_at >= %s::date")
+        params.append(since)
+    if until:
+        conditions.append("e.created_at < %s::date + 1")
+        params.append(until)
+    if cursor:
+        value, entry_id = _decode_cursor(cursor)
+        # Walking forward follows sort_order; walking back goes against it.
+        operator = "<" if (sort_order == "desc") != backwards else ">"
+        if column == "entry_id":
+            conditions.append(f"e.entry_id {operator} %s")
+            params.append(entry_id)
+        else:
+            conditions.append(f"(e.{column}, e.entry_id) {operator} (%s::{cast}, %s)")
+            params += [value, entry_id]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = {"asc": "ASC", "desc": "DESC"}[sort_order]
+    if backwards:
+        order = "DESC" if order == "ASC" else "ASC"
+    order_by = (
+        f"e.entry_id {order}"
+        if column == "entry_id"
+        else f"e.{column} {order}, e.entry_id {order}"
+    )
+    try:
+        with transaction() as cur:
+            # One extra row is fetched to tell whether another page follows.
+            cur.execute(
+                f"""
+                SELECT e.entry_id, e.entry_data, e.creator_name, e.{column},
+                       e.created_at_display, e.project_name, e.authors, e.images, e.tags
+                FROM entry_summary e
+                {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """,
+                params + [page_size + 1],
+            )
             rows = cur.fetchall()
-            return [
-                {
-                    "id": row[0],
-                    "data": row[1],
-                    "creator": row[2],
-                    "created_at": row[3].strftime("%B %d, %Y - %I:%M %p"),
-                    "project": row[4],
-                    "authors": row[5] or [],
-                    "images": row[6] or [],
-                }
-                for row in rows
-            ]
     except Exception as e:
-        print(f"An error occurred while fetching entries: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
+        print(f"An error occurred while fetching a page of entries: {e}")
+        return {"entries": [], "next_cursor": None, "prev_cursor": None}
 
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        if not has_more:
+            # Walked back to the start: serve a full first page.
+            return fetch_entries_page(
+                None,
+                page_size,
+                tags=tags,
+                match=match,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                project=project,
+                author=author,
+                creator=creator,
+                since=since and since.isoformat(),
+                until=until and until.isoformat(),
+            )
+        rows.reverse()
 
-def fetch_all_projects():
-    """Fetches a list of all project names."""
-    conn = None
+    entries = [
+        {
+            "id": row[0],
+            "data": row[1],
+            "creator": row[2],
+            "created_at": row[4],
+            "project": row[5],
+            "authors": row[6],
+            "images": row[7],
+            "tags": row[8],
+        }
+        for row in rows
+    ]
+    first, last = (rows[0], rows[-1]) if rows else (None, None)
+    newer_exist = backwards or cursor is not None
+    older_exist = has_more or backwards
+    return {
+        "entries": entries,
+        "next_cursor": (
+            _encode_cursor(last[3], last[0]) if last and older_exist else None
+        ),
+        "prev_cursor": (
+            _encode_cursor(first[3], first[0]) if first and newer_exist else None
+        ),
+    }
+
+
+def _encode_search_cursor(rank, entry_id):
+    """Packs a (rank, entry_id) search result position into a URL-safe token."""
+    return base64.urlsafe_b64encode(f"{rank!r}|{entry_id}".encode()).decode()
+
+
+def _decode_search_cursor(cursor):
+    """Unpacks a token made by _encode_search_cursor; raises ValueError if malformed."""
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
-            cur.execute("SELECT project_name FROM projects ORDER BY project_name;")
-            return [row[0] for row in cur.fetchall()]
+        rank, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(rank), int(entry_id)
+    except Exception as e:
+        raise ValueError(f"Invalid search cursor: {cursor!r}") from e
+
+
+# ts_headline wraps matched words in these; callers swap them for <mark> or
+# Slack bold after escaping the text around them.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", '
+    'MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=" ... "'
+)
+
+
+def search_entries(query, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Full-text search over entry text and project names, best match first.
+    Matching uses the GIN index on entries.search_vector; ranking covers the
+    matches, snippets are only computed for the rows on the page, and their
+    projects, authors and images come from entry_summary. Returns the entries
+    (each with a highlighted "snippet") and a next_cursor for the following
+    page, or None.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if not (query or "").strip():
+        return {"entries": [], "next_cursor": None}
+    after = ""
+    params = {"query": query, "limit": limit + 1, "options": HEADLINE_OPTIONS}
+    if cursor:
+        params["rank"], params["entry_id"] = _decode_search_cursor(cursor)
+        after = "WHERE (rank, entry_id) < (%(rank)s::real, %(entry_id)s)"
+    try:
+        with transaction() as cur:
+            cur.execute(
+                f"""
+                WITH q AS (
+                    SELECT websearch_to_tsquery('english', %(query)s) AS query
+                ),
+                matches AS (
+                    SELECT e.entry_id, e.entry_data, e.creator_name,
+                           ts_rank_cd(e.search_vector, q.query) AS rank
+                    FROM entries e, q
+                    WHERE e.search_vector @@ q.query
+                ),
+                page AS (
+                    SELECT * FROM matches
+                    {after}
+                    ORDER BY rank DESC, entry_id DESC
+                    LIMIT %(limit)s
+                )
+                SELECT page.entry_id, page.entry_data, page.creator_name,
+                       s.created_at_display, s.project_name, s.authors, s.images,
+                       ts_headline(
+                           'english',
+                           array_to_string(page.entry_data, ' / '),
+                           q.query,
+                           %(options)s
+                       ) AS snippet,
+                       page.rank
+                FROM page
+                JOIN entry_summary s ON s.entry_id = page.entry_id
+                CROSS JOIN q
+                ORDER BY page.rank DESC, page.entry_id DESC;
+            """,
+                params,
+            )
+            rows = cur.fetchall()
+    except Exception as e:
+        print(f"An error occurred while searching entries: {e}")
+        return {"entries": [], "next_cursor": None}
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    entries = [
+        {
+            "id": row[0],
+            "data": row[1],
+            "creator": row[2],
+            "created_at": row[3],
+            "project": row[4],
+            "authors": row[5],
+            "images": row[6],
+            "snippet": row[7],
+        }
+        for row in rows
+    ]
+    last = rows[-1] if rows else None
+    return {
+        "entries": entries,
+        "next_cursor": (
+            _encode_search_cursor(last[8], last[0]) if last and has_more else None
+        ),
+    }
+
+
+def _load_project_names():
+    with transaction() as cur:
+        cur.execute("SELECT project_name FROM projects ORDER BY project_name;")
+        return [row[0] for row in cur.fetchall()]
+
+
+def refresh_project_cache():
+    """Reloads the project name cache from the database and returns it."""
+    global _project_names
+    try:
+        names = _load_project_names()
     except Exception as e:
         print(f"An error occurred while fetching projects: {e}")
+        return _project_names or []
+    with _project_names_lock:
+        _project_names = names
+    _project_search_cache.clear()
+    return names
+
+
+def _add_cached_project(project_name):
+    """Adds a project this process just created without waiting for the NOTIFY."""
+    with _project_names_lock:
+        if _project_names is not None:
+            i = bisect.bisect_left(_project_names, project_name)
+            if i == len(_project_names) or _project_names[i] != project_name:
+                _project_names.insert(i, project_name)
+    _project_search_cache.clear()
+
+
+def notify_projects_changed(cursor):
+    """Queues a NOTIFY that is delivered to every listener when the transaction commits."""
+    cursor.execute(f"NOTIFY {PROJECTS_CHANNEL};")
+
+
+def _listen_for_project_changes():
+    """Holds a dedicated LISTEN connection and reloads the cache on every NOTIFY."""
+    while True:
+        conn = None
+        try:
+            conn = connect_from_env()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {PROJECTS_CHANNEL};")
+                # Catch up on anything created while we were not listening.
+                refresh_project_cache()
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        # Idle: make sure the connection is still alive. Any
+                        # NOTIFY that arrives with the reply lands in
+                        # conn.notifies too, so fall through and drain it.
+                        cur.execute("SELECT 1;")
+                    else:
+                        conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        refresh_project_cache()
+        except Exception as e:
+            print(f"Project cache listener error, reconnecting: {e}")
+            time.sleep(5)
+        finally:
+            if conn:
+                conn.close()
+
+
+def start_project_listener():
+    """Starts this process's project cache listener thread, once per PID."""
+    global _listener_pid
+    with _project_names_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+    threading.Thread(
+        target=_listen_for_project_changes, name="project-listener", daemon=True
+    ).start()
+
+
+def fetch_all_projects():
+    """Returns a list of all project names from the in-process cache."""
+    start_project_listener()
+    names = _project_names
+    if names is None:
+        names = refresh_project_cache()
+    return list(names)
+
+
+# Prefix matches use projects_lower_name_idx; the trigram operator and
+# similarity() use projects_name_trgm_idx (migration 3). LIKE's default escape
+# character is a backslash, which search_projects uses to quote wildcards.
+SEARCH_PROJECTS_SQL = """
+    SELECT project_name
+    FROM projects
+    WHERE lower(project_name) LIKE %(prefix)s
+       OR project_name %% %(query)s
+    ORDER BY lower(project_name) LIKE %(prefix)s DESC,
+             similarity(project_name, %(query)s) DESC,
+             project_name
+    LIMIT %(limit)s;
+"""
+
+
+def search_projects(query, limit=PROJECT_SEARCH_LIMIT):
+    """
+    Returns up to `limit` project names matching a typeahead query: prefix
+    matches first, then trigram-similar names. An empty query lists the first
+    projects alphabetically. Results are cached per query.
+    """
+    query = (query or "").strip().lower()
+    key = (query, limit)
+    names = _project_search_cache.get(key)
+    if names is not None:
+        return names
+    try:
+        with transaction() as cur:
+            if query:
+                prefix = (
+                    query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    + "%"
+                )
+                cur.execute(
+                    SEARCH_PROJECTS_SQL,
+                    {"prefix": prefix, "query": query, "limit": limit},
+                )
+            else:
+                cur.execute(
+                    "SELECT project_name FROM projects ORDER BY project_name LIMIT %s;",
+                    (limit,),
+                )
+            names = [row[0] for row in cur.fetchall()]
+    except Exception as e:
+        print(f"An error occurred while searching projects: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
+    _project_search_cache.set(key, names)
+    return names
 
 
 def delete_entry(entry_id):
     """Deletes a specific entry and its linked data from the database."""
-    conn = None
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
+        with transaction() as cur:
             cur.execute("DELETE FROM entries WHERE entry_id = %s;", (entry_id,))
-            conn.commit()
+            if cur.rowcount:
+                bump_notebook_version(cur)
     except Exception as e:
         print(f"Error deleting entry {entry_id}: {e}")
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
 
 
 def fetch_single_entry(entry_id):
     """Fetches a single entry by its ID for editing."""
-    conn = None
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
+        with transaction() as cur:
             cur.execute(
                 """
-                SELECT e.entry_id, e.entry_data, p.project_name
-                FROM entries e
-                LEFT JOIN project_entries pe ON e.entry_id = pe.entry_id
-                LEFT JOIN projects p ON pe.project_id = p.project_id
-                WHERE e.entry_id = %s;
+                SELECT entry_id, entry_data, project_name
+                FROM entry_summary
+                WHERE entry_id = %s;
             """,
                 (entry_id,),
             )
@@ -208,18 +798,15 @@ def fetch_single_entry(entry_id):
     except Exception as e:
         print(f"Error fetching single entry {entry_id}: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 
 def update_entry(entry_id, data):
     """Updates an existing entry in the database."""
-    conn = None
     try:
-        conn = connect_from_env()
-        with conn.cursor() as cur:
-            project_id = get_or_create_project_id(cur, data["project_name"])
+        with transaction() as cur:
+            project_id, created_project = get_or_create_project_id(
+                cur, data["project_name"]
+            )
             entry_data_pg = [data["what_did"], data["what_next"]]
 
             cur.execute(
@@ -232,12 +819,8 @@ def update_entry(entry_id, data):
                 "INSERT INTO project_entries (project_id, entry_id) VALUES (%s, %s);",
                 (project_id, entry_id),
             )
-
-            conn.commit()
+            bump_notebook_version(cur)
+        if created_project:
+            _add_cached_project(data["project_name"])
     except Exception as e:
         print(f"Error updating entry {entry_id}: {e}")
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
@@ -1,17 +1,73 @@
+import os
+import time
+import threading
 import requests
 import json
+import http_client
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cache import TTLCache, SQLiteCache, TieredCache
 
+GRAPHQL_URL = "https://api.ftcscout.org/graphql"
 
-def fetch_team_stats(team_number):
-    """Fetches OPR stats for a single team from ftcscout.org."""
-    query = f"""
-    query {{
-        teamByNumber(number: {team_number}) {{
+SEASON = 2024
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket: allows bursts of up to `capacity` calls and
+    refills at `rate` tokens per second.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every thread in the process so concurrent fetches stay polite.
+rate_limiter = TokenBucket(
+    rate=float(os.environ.get("FTC_SCOUT_RATE", 5)),
+    capacity=int(os.environ.get("FTC_SCOUT_BURST", 10)),
+)
+
+
+# Responses keyed by query, season and team; the disk tier survives restarts
+# so repeat lookups during an event are answered locally.
+response_cache = TieredCache(
+    memory=TTLCache(maxsize=int(os.environ.get("FTC_CACHE_SIZE", 1024))),
+    disk=SQLiteCache(os.environ.get("FTC_CACHE_PATH", "ftc_cache.sqlite3")),
+    ttl=int(os.environ.get("FTC_CACHE_TTL", 900)),
+)
+
+
+def _cache_key(query_name, team_number):
+    return f"{query_name}:{SEASON}:{str(team_number).strip()}"
+
+
+# Stats selected for each aliased team in the multi-team query.
+TEAM_STATS_FIELDS = f"""
             name
-            events(season: 2024) {{
+            events(season: {SEASON}) {{
                 stats {{
                     __typename
-                    ... on TeamEventStats2024 {{
+                    ... on TeamEventStats{SEASON} {{
                         opr {{
                             autoSamplePoints
                             autoSpecimenPoints
@@ -25,19 +81,101 @@ def fetch_team_stats(team_number):
                     }}
                 }}
             }}
-        }}
-    }}
+"""
+
+
+def _query_many_team_stats(team_numbers, timeout=None):
     """
-    try:
-        response = requests.post(
-            "https://api.ftcscout.org/graphql", json={"query": query}
+    Requests stats for several teams in one POST, one `t<number>` alias per team.
+    Returns (stats by team, errors by team); a team whose alias reported a
+    GraphQL error or came back empty is listed in errors instead of stats.
+    """
+    aliases = {f"t{team}": team for team in team_numbers}
+    selections = "".join(f"""
+        {alias}: teamByNumber(number: {team}) {{
+            {TEAM_STATS_FIELDS}
+        }}""" for alias, team in aliases.items())
+    rate_limiter.acquire()
+    response = http_client.post(
+        GRAPHQL_URL, json={"query": f"query {{{selections}\n}}"}, timeout=timeout
+    )
+    response.raise_for_status()
+    payload = response.json()
+
+    errors = {}
+    for error in payload.get("errors") or []:
+        path = error.get("path") or []
+        if path and path[0] in aliases:
+            errors[aliases[path[0]]] = error.get("message", "GraphQL error")
+    data = payload.get("data") or {}
+    results = {}
+    for alias, team in aliases.items():
+        if team in errors:
+            continue
+        if data.get(alias):
+            results[team] = data[alias]
+        else:
+            errors[team] = f"No stats found for team {team}"
+    return results, errors
+
+
+def fetch_many_team_stats(
+    team_numbers,
+    batch_size=int(os.environ.get("FTC_BATCH_SIZE", 25)),
+    max_workers=4,
+    timeout=None,
+    on_progress=None,
+    force_refresh=False,
+):
+    """
+    Fetches OPR stats for many teams with batched, aliased GraphQL queries.
+    Cached teams are answered locally; the rest are split into batches of
+    batch_size that run concurrently on a bounded thread pool, throttled by
+    the shared rate limiter. Returns (stats by team, errors by team).
+    on_progress(done, total) is called after each batch finishes.
+    """
+    results = {}
+    errors = {}
+    missing = []
+    for team in dict.fromkeys(team_numbers):
+        if not str(team).isdigit():
+            errors[team] = f"Invalid team number: {team!r}"
+            continue
+        cached = (
+            None
+            if force_refresh
+            else response_cache.get(_cache_key("team_stats", team))
         )
-        response.raise_for_status()  # Raise an exception for bad status codes
-        data = response.json()
-        return data.get("data", {}).get("teamByNumber")
-    except (requests.RequestException, json.JSONDecodeError) as e:
-        print(f"Error fetching stats for team {team_number}: {e}")
-        return None
+        if cached is not None:
+            results[team] = cached
+        else:
+            missing.append(team)
+
+    total = len(results) + len(errors) + len(missing)
+    done = len(results) + len(errors)
+    if on_progress and done:
+        on_progress(done, total)
+
+    batches = [missing[i : i + batch_size] for i in range(0, len(missing), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_query_many_team_stats, batch, timeout): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                batch_results, batch_errors = future.result()
+            except Exception as e:
+                batch_results, batch_errors = {}, {team: str(e) for team in batch}
+            for team, stats in batch_results.items():
+                response_cache.set(_cache_key("team_stats", team), stats)
+            results.update(batch_results)
+            errors.update(batch_errors)
+            done += len(batch)
+            if on_progress:
+                on_progress(done, total)
+    return results, errors
 
 
 def get_best_stats(stats_list):
@@ -63,11 +201,20 @@ def get_best_stats(stats_list):
     return {key: round(value, 2) for key, value in best_stats.items()}
 
 
-def ftc(teamNum):
+def _is_team_found(payload):
     """
-    Fetches general information for a single FTC team.
+    Whether a team info response is worth caching: no GraphQL errors and a
+    team in the data. Errors and unknown teams are asked again next time.
+    """
+    return not payload.get("errors") and bool(
+        (payload.get("data") or {}).get("teamByNumber")
+    )
+
+
+def ftc(teamNum, force_refresh=False):
+    """
+    Fetches general information for a single FTC team, via the response cache.
     """
-    url = "https://api.ftcscout.org/graphql"
     body = f"""
     query {{
         teamByNumber(number: {teamNum}) {{
@@ -77,7 +224,7 @@ def ftc(teamNum):
                 city, state, country
             }}
             rookieYear
-            quickStats(season:2024) {{
+            quickStats(season:{SEASON}) {{
                 tot {{
                   value
                   rank
@@ -86,10 +233,20 @@ def ftc(teamNum):
         }}
     }}
     """
-    try:
-        response = requests.post(url=url, json={"query": body})
+
+    def fetch():
+        rate_limiter.acquire()
+        response = http_client.post(GRAPHQL_URL, json={"query": body})
         response.raise_for_status()
         return response.json()
+
+    try:
+        return response_cache.get_or_fetch(
+            _cache_key("team_info", teamNum),
+            fetch,
+            force_refresh=force_refresh,
+            cacheable=_is_team_found,
+        )
     except (requests.RequestException, json.JSONDecodeError) as e:
         print(f"Error fetching FTC data for team {teamNum}: {e}")
         return None
@@ -1,12 +1,49 @@
 import os
 import json
+import time
+import bisect
+import threading
 import gspread
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
+from job_queue import background_jobs
 
 # --- Globals for caching ---
 gc = None
+spreadsheet = None
 teams_sheet = None
 scouting_sheet = None
+opr_sheet = None
+
+# Ranges sent per values:batchUpdate request before quota errors force smaller chunks.
+MAX_RANGES_PER_REQUEST = 500
+
+# --- Worksheet read cache ---
+# Full worksheet values by worksheet id. Within SHEET_CACHE_TTL seconds of the
+# last check a read is served from memory; after that one Drive metadata call
+# compares the spreadsheet's modifiedTime and the values are only re-read if
+# it moved. Writes made through this module drop the affected worksheet.
+SHEET_CACHE_TTL = int(os.environ.get("SHEET_CACHE_TTL", 30))
+_sheet_cache = {}
+_sheet_cache_lock = threading.Lock()
+_team_rows = None  # (teams values, {team number: row})
+
+# --- Unscouted team index ---
+# Teams not yet in the scouting sheet, searchable by number or name prefix.
+# append_scout_rows removes a team as soon as it is scouted; a full rebuild
+# from both sheets is queued on background_jobs once the index is older than
+# TEAM_INDEX_TTL seconds, and searches keep using the old index meanwhile.
+TEAM_INDEX_TTL = int(os.environ.get("TEAM_INDEX_TTL", 600))
+TEAM_SEARCH_LIMIT = 50
+_unscouted = {}  # team number -> team name
+_team_keys = []  # sorted (search key, team number) pairs
+_team_index_built_at = None
+_team_index_rebuilding = False
+# Teams marked scouted while a rebuild is reading the sheets; the rebuild's
+# snapshot may predate their rows, so they are dropped from it before use.
+_scouted_during_build = set()
+_team_index_lock = threading.Lock()
 
 
 def init_google_sheets():
@@ -14,8 +51,8 @@ def init_google_sheets():
     Initializes the Google Sheets client and worksheets.
     Caches the client and sheets for subsequent calls.
     """
-    global gc, teams_sheet, scouting_sheet
-    if gc and teams_sheet and scouting_sheet:
+    global gc, spreadsheet, teams_sheet, scouting_sheet, opr_sheet
+    if gc and teams_sheet and scouting_sheet and opr_sheet:
         return True
 
     try:
@@ -38,6 +75,7 @@ def init_google_sheets():
         spreadsheet = gc.open("Worlds Scouting Spreadsheet 2025")
         teams_sheet = spreadsheet.worksheet("FRANKLIN OPRs")
         scouting_sheet = spreadsheet.sheet1
+        opr_sheet = spreadsheet.sheet1
         return True
 
     except Exception as e:
@@ -45,13 +83,65 @@ def init_google_sheets():
         return False
 
 
+def _modified_time():
+    """The spreadsheet's Drive modifiedTime, or None if it cannot be read."""
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except Exception as e:
+        print(f"Could not read spreadsheet modifiedTime: {e}")
+        return None
+
+
+def get_cached_values(sheet):
+    """Returns all values of a worksheet through the read cache."""
+    now = time.monotonic()
+    with _sheet_cache_lock:
+        cached = _sheet_cache.get(sheet.id)
+    if cached and now - cached["checked_at"] < SHEET_CACHE_TTL:
+        return cached["values"]
+    modified = _modified_time()
+    if cached and modified is not None and modified == cached["modified"]:
+        cached["checked_at"] = now
+        return cached["values"]
+    values = sheet.get_all_values()
+    with _sheet_cache_lock:
+        _sheet_cache[sheet.id] = {
+            "values": values,
+            "modified": modified,
+            "checked_at": now,
+        }
+    return values
+
+
+def invalidate_sheet(sheet):
+    """Forgets the cached values of a worksheet after writing to it."""
+    with _sheet_cache_lock:
+        _sheet_cache.pop(sheet.id, None)
+
+
 def get_all_teams():
     """
     Fetches all teams from the 'FRANKLIN OPRs' worksheet.
     """
     if not init_google_sheets():
         return []
-    return teams_sheet.get_all_values()[1:]  # Skip header
+    return get_cached_values(teams_sheet)[1:]  # Skip header
+
+
+def get_team_row(team_number):
+    """Looks up a team's row in the 'FRANKLIN OPRs' worksheet by team number."""
+    global _team_rows
+    if not init_google_sheets():
+        return None
+    values = get_cached_values(teams_sheet)
+    index = _team_rows
+    if index is None or index[0] is not values:
+        index = (
+            values,
+            {str(row[1]).strip(): row for row in values[1:] if len(row) > 1},
+        )
+        _team_rows = index
+    return index[1].get(str(team_number).strip())
 
 
 def get_scouted_teams():
@@ -60,26 +150,186 @@ def get_scouted_teams():
     """
     if not init_google_sheets():
         return set()
-    scouted_data = scouting_sheet.get_all_values()
+    scouted_data = get_cached_values(scouting_sheet)
     return {row[1] for row in scouted_data[1:]} if scouted_data else set()
 
 
-def append_scout_data(new_row):
+def append_scout_rows(rows):
     """
-    Appends a new row of scouting data to the sheet.
+    Appends rows of scouting data to the sheet in a single request.
     """
     if not init_google_sheets():
         raise ConnectionError("Could not connect to Google Sheets.")
-    scouting_sheet.append_row(new_row)
+    scouting_sheet.append_rows(rows)
+    invalidate_sheet(scouting_sheet)
+    for row in rows:
+        mark_team_scouted(row[1])
+
+
+def _index_keys(number, name):
+    """Search keys for a team: its number, its full name and each word of it."""
+    name = name.lower()
+    return {number, name, *name.split()}
+
+
+def build_team_index():
+    """Rebuilds the unscouted team index from the teams and scouting sheets."""
+    global _unscouted, _team_keys, _team_index_built_at
+    if not init_google_sheets():
+        raise ConnectionError("Could not connect to Google Sheets.")
+    with _team_index_lock:
+        _scouted_during_build.clear()
+    scouted = get_scouted_teams()
+    unscouted = {
+        str(team[1]).strip(): team[0]
+        for team in get_all_teams()
+        if len(team) > 1 and str(team[1]).strip() not in scouted
+    }
+    keys = sorted(
+        (key, number)
+        for number, name in unscouted.items()
+        for key in _index_keys(number, name)
+    )
+    with _team_index_lock:
+        for number in _scouted_during_build:
+            unscouted.pop(number, None)
+        _unscouted, _team_keys = unscouted, keys
+        _team_index_built_at = time.monotonic()
+    return len(unscouted)
+
+
+def mark_team_scouted(team_number):
+    """Drops a team from the index; its stale search keys are skipped on lookup."""
+    with _team_index_lock:
+        _unscouted.pop(str(team_number).strip(), None)
+        _scouted_during_build.add(str(team_number).strip())
+
+
+def _rebuild_team_index():
+    global _team_index_rebuilding
+    try:
+        build_team_index()
+    finally:
+        with _team_index_lock:
+            _team_index_rebuilding = False
+
+
+def _schedule_team_index_rebuild():
+    """Queues one background rebuild of the team index unless one is pending."""
+    global _team_index_rebuilding
+    with _team_index_lock:
+        if _team_index_rebuilding:
+            return
+        _team_index_rebuilding = True
+    if not background_jobs.submit(_rebuild_team_index):
+        with _team_index_lock:
+            _team_index_rebuilding = False
+
+
+def search_unscouted_teams(query, limit=TEAM_SEARCH_LIMIT):
+    """
+    Returns up to `limit` (team number, team name) pairs for unscouted teams
+    whose number, name or a word of the name starts with query. An empty
+    query lists teams in number order. Never reads the sheets itself: a
+    stale or missing index is rebuilt in the background, and until then
+    the old index (or no teams) is served.
+    """
+    if (
+        _team_index_built_at is None
+        or time.monotonic() - _team_index_built_at > TEAM_INDEX_TTL
+    ):
+        _schedule_team_index_rebuild()
+    query = (query or "").strip().lower()
+    with _team_index_lock:
+        unscouted = _unscouted
+        if not query:
+            numbers = sorted(unscouted, key=lambda n: (len(n), n))[:limit]
+            return [(number, unscouted[number]) for number in numbers]
+        found = {}
+        i = bisect.bisect_left(_team_keys, (query,))
+        while i < len(_team_keys) and len(found) < limit:
+            key, number = _team_keys[i]
+            if not key.startswith(query):
+                break
+            if number in unscouted:
+                found.setdefault(number, unscouted[number])
+            i += 1
+    return list(found.items())
+
+
+def _same_cell(old, new):
+    """Compares a value read back from Sheets with one about to be written."""
+    if str(old) == str(new):
+        return True
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return False
+
+
+def _changed_ranges(current, rows):
+    """
+    Diffs the grid about to be written against the sheet's current values and
+    returns one {"range", "values"} item per run of changed cells in a row.
+    """
+    data = []
+    for r, row in enumerate(rows):
+        old_row = current[r] if r < len(current) else []
+        c = 0
+        while c < len(row):
+            if c < len(old_row) and _same_cell(old_row[c], row[c]):
+                c += 1
+                continue
+            start = c
+            while c < len(row) and not (
+                c < len(old_row) and _same_cell(old_row[c], row[c])
+            ):
+                c += 1
+            data.append(
+                {
+                    "range": f"{rowcol_to_a1(r + 1, start + 1)}:{rowcol_to_a1(r + 1, c)}",
+                    "values": [row[start:c]],
+                }
+            )
+    return data
+
+
+def _batch_update_with_backoff(sheet, data, max_retries=5):
+    """
+    Sends ranges in as few batch_update calls as possible. On a quota error
+    (HTTP 429) it backs off exponentially and halves the chunk size.
+    """
+    chunk_size = MAX_RANGES_PER_REQUEST
+    attempt = 0
+    i = 0
+    while i < len(data):
+        chunk = data[i : i + chunk_size]
+        try:
+            sheet.batch_update(chunk)
+            i += len(chunk)
+            attempt = 0
+        except APIError as e:
+            if e.response.status_code != 429 or attempt >= max_retries:
+                raise
+            chunk_size = max(1, chunk_size // 2)
+            print(
+                f"Sheets quota hit, retrying in {2**attempt}s with {chunk_size} ranges"
+            )
+            time.sleep(2**attempt)
+            attempt += 1
 
 
 def update_opr_sheet(header, rows):
     """
-    Updates the OPR sheet with new data.
+    Updates the OPR sheet with new data, writing only the cells that changed.
+    Returns the number of cells written.
     """
     if not init_google_sheets():
         raise ConnectionError("Could not connect to Google Sheets.")
-    sheet = gc.open("Worlds Scouting Spreadsheet 2025").sheet1
-    sheet.update("A1:J1", [header])
-    for i, row in enumerate(rows, start=2):
-        sheet.update(f"A{i}:J{i}", [row])
+    grid = [header] + rows
+    current = opr_sheet.get_values(f"A1:{rowcol_to_a1(len(grid), len(header))}")
+    data = _changed_ranges(current, grid)
+    _batch_update_with_backoff(opr_sheet, data)
+    if data:
+        invalidate_sheet(opr_sheet)
+    return sum(len(item["values"][0]) for item in data)
@@ -1,10 +1,10 @@
 import os.path
+import threading
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
@@ -14,7 +14,16 @@ SPREADSHEET_ID = "1MtEOlfBOeKJcHLlKiM7b-rIchdPH6ZA7pGAJUnIXAII"
 SAMPLE_RANGE_NAME = "Sheet1!A1"
 
 
-def outreach_upload(valueData, client):
+# The Sheets service is built once per process; building it parses the
+# discovery document, which is slow. httplib2 connections are not thread-safe,
+# so requests through the shared service are serialized by _service_lock.
+_creds = None
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def _load_credentials():
     creds = None
     # The file token.json stores the user's access and refresh tokens and is
     # created automatically when the authorization flow completes for the first time.
@@ -27,40 +36,52 @@ def outreach_upload(valueData, client):
         else:
             flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
             creds = flow.run_local_server(port=3000)
-        # Save the credentials for the next run
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+        _save_credentials(creds)
+    return creds
+
+
+def _save_credentials(creds):
+    # Save the credentials for the next run
+    with open("token.json", "w") as token:
+        token.write(creds.to_json())
 
-    try:
-        # Build the service
-        service = build("sheets", "v4", credentials=creds)
-        sheet = service.spreadsheets()
 
-        # Get the current data in the sheet to find the next available row
-        result = sheet.values().get(spreadsheetId=SPREADSHEET_ID, range="Sheet1!A1:A").execute()
-        values = result.get('values', [])
-        
-        # Find the next available row
-        next_row = len(values) + 1  # The next empty row
-        next_range = f"Sheet1!A{next_row}"
+def _get_service():
+    """
+    Returns this process's Sheets service, refreshing an expired token first.
+    Must be called with _service_lock held.
+    """
+    global _creds, _service, _service_pid
+    if _service is None or _service_pid != os.getpid():
+        _creds = _load_credentials()
+        _service = build("sheets", "v4", credentials=_creds, cache_discovery=False)
+        _service_pid = os.getpid()
+    elif not _creds.valid:
+        _creds.refresh(Request())
+        _save_credentials(_creds)
+    return _service
 
-        # Prepare the body for the update
-        body = {
-            "values": [valueData]
-        }
 
-        # Update the sheet with the new data
+def append_outreach_rows(rows):
+    """
+    Appends outreach rows below the existing data in one request and returns
+    the number of cells written. Sheets picks the rows server-side, so
+    concurrent appends never overwrite each other. Raises HttpError on failure.
+    """
+    with _service_lock:
         result = (
-            sheet.values()
-            .update(spreadsheetId=SPREADSHEET_ID, range=next_range, valueInputOption="USER_ENTERED", body=body)
+            _get_service()
+            .spreadsheets()
+            .values()
+            .append(
+                spreadsheetId=SPREADSHEET_ID,
+                range=SAMPLE_RANGE_NAME,
+                valueInputOption="USER_ENTERED",
+                insertDataOption="INSERT_ROWS",
+                body={"values": rows},
+            )
             .execute()
         )
-        print(f"{result.get('updatedCells')} cells updated.")
-        return result.get('updatedCells')
-
-    except HttpError as err:
-        print(err)
-        return err
-
-
-
+    updated = result.get("updates", {}).get("updatedCells")
+    print(f"{updated} cells updated.")
+    return updated
@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds applied to every outbound call unless overridden.
+DEFAULT_TIMEOUT = (
+    float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05)),
+    float(os.environ.get("HTTP_READ_TIMEOUT", 15)),
+)
+
+# Upper bounds, in milliseconds, of the latency histogram buckets.
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_latencies = {}
+_latencies_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns this process's shared requests.Session. Connections are kept alive
+    and pooled, and idempotent calls (including GraphQL POSTs) are retried with
+    exponential backoff on connection errors, 429 and 5xx responses.
+    """
+    global _session, _session_pid
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            retry = Retry(
+                total=int(os.environ.get("HTTP_RETRIES", 3)),
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "POST"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=int(os.environ.get("HTTP_POOL_SIZE", 10)),
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            _session_pid = os.getpid()
+    return _session
+
+
+def _record_latency(endpoint, elapsed_ms, failed):
+    with _latencies_lock:
+        histogram = _latencies.setdefault(
+            endpoint,
+            {
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "buckets": [0] * len(LATENCY_BUCKETS_MS),
+            },
+        )
+        histogram["count"] += 1
+        histogram["errors"] += int(failed)
+        histogram["total_ms"] += elapsed_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                histogram["buckets"][i] += 1
+                break
+
+
+def post(url, timeout=None, **kwargs):
+    """POSTs through the shared session, recording latency for the endpoint."""
+    endpoint = "{0.netloc}{0.path}".format(urlsplit(url))
+    started = time.monotonic()
+    failed = True
+    try:
+        response = get_session().post(url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        failed = not response.ok
+        return response
+    finally:
+        _record_latency(endpoint, (time.monotonic() - started) * 1000, failed)
+
+
+def latency_stats():
+    """Returns per-endpoint call counts, error counts, mean and bucketed latencies."""
+    labels = [
+        f"<={bound:g}ms" if bound != float("inf") else "slower"
+        for bound in LATENCY_BUCKETS_MS
+    ]
+    with _latencies_lock:
+        return {
+            endpoint: {
+                "count": h["count"],
+                "errors": h["errors"],
+                "mean_ms": round(h["total_ms"] / h["count"], 1),
+                "histogram": dict(zip(labels, h["buckets"])),
+            }
+            for endpoint, h in _latencies.items()
+        }
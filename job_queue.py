@@ -0,0 +1,163 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    A bounded in-process job queue drained by a small pool of worker threads.
+    Failed jobs are retried with exponential backoff and, once out of retries
+    (or on an error not listed in their retry_on), logged as dead letters
+    and handed to their on_failure callback.
+    """
+
+    def __init__(self, name, maxsize=100, workers=2, max_retries=2, backoff=1.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.dead_letters = deque(maxlen=50)
+        self.counters = {
+            "submitted": 0,
+            "rejected": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+        }
+
+    def _ensure_started(self):
+        """Starts the workers in the current process (again, after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.maxsize)
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(
+                    target=self._work, name=f"{self.name}-worker-{i}", daemon=True
+                )
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, func, *args, on_failure=None, retry_on=(Exception,), **kwargs):
+        """
+        Enqueues func(*args, **kwargs) without blocking. Only exceptions that
+        are instances of retry_on are retried.
+        Returns False if the queue is full and the job was not accepted.
+        """
+        self._ensure_started()
+        job = {
+            "func": func,
+            "args": args,
+            "kwargs": kwargs,
+            "on_failure": on_failure,
+            "retry_on": retry_on,
+            "enqueued_at": time.monotonic(),
+        }
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            logger.warning(f"Job queue '{self.name}' is full; rejected {func.__name__}")
+            return False
+        self._count("submitted")
+        return True
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        name = job["func"].__name__
+        for attempt in range(self.max_retries + 1):
+            try:
+                job["func"](*job["args"], **job["kwargs"])
+                self._count("succeeded")
+                return
+            except Exception as e:
+                error = e
+                if (
+                    attempt < self.max_retries
+                    and isinstance(e, job["retry_on"])
+                    and not self._stopping.is_set()
+                ):
+                    self._count("retried")
+                    logger.warning(
+                        f"Job {name} failed (attempt {attempt + 1}), retrying: {e}"
+                    )
+                    time.sleep(self.backoff * 2**attempt)
+                else:
+                    break
+
+        self._count("dead_lettered")
+        self.dead_letters.append(
+            {"job": name, "error": repr(error), "failed_at": time.time()}
+        )
+        logger.error(f"Dead letter in '{self.name}': {name} failed: {error!r}")
+        if job["on_failure"]:
+            try:
+                job["on_failure"](error)
+            except Exception as e:
+                logger.error(f"on_failure callback for {name} raised: {e}")
+
+    def stats(self):
+        """Returns queue depth, capacity and job counters."""
+        with self._lock:
+            return {
+                "depth": self._queue.qsize() if self._queue else 0,
+                "maxsize": self.maxsize,
+                "workers": self.workers,
+                **self.counters,
+            }
+
+    def shutdown(self, timeout=10.0):
+        """Lets the workers finish queued jobs, waiting up to timeout seconds."""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self._queue.put(None, timeout=max(0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+
+# Shared queue for work that must not run on the Slack request path.
+background_jobs = JobQueue(
+    "background",
+    maxsize=int(os.environ.get("JOB_QUEUE_SIZE", 100)),
+    workers=int(os.environ.get("JOB_WORKERS", 4)),
+    max_retries=int(os.environ.get("JOB_RETRIES", 2)),
+)
+atexit.register(background_jobs.shutdown)
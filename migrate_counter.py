@@ -0,0 +1,47 @@
+import os
+import hickle as hkl
+from database_helpers import connect_from_env
+from reset_counter import SEQUENCE_SQL, set_entry_counter
+
+# The file that stored the entry count before it moved into Postgres
+COUNTER_FILE = "entrys"
+
+
+def migrate_counter():
+    """
+    One-time migration: seeds the entry sequence from the old hickle counter
+    file. The sequence never moves backwards, so running this twice is harmless.
+    """
+    if not os.path.exists(COUNTER_FILE):
+        print(f"No counter file '{COUNTER_FILE}' found; nothing to migrate.")
+        return
+
+    file_count = int(hkl.load(COUNTER_FILE))
+    conn = None
+    try:
+        conn = connect_from_env()
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT (SELECT COALESCE(MAX(entry_id), 0) FROM entries),
+                       COALESCE(pg_sequence_last_value({SEQUENCE_SQL}::regclass), 0);
+                """)
+            highest_entry, sequence_count = cur.fetchone()
+            last_used = max(file_count, highest_entry, sequence_count)
+            print(
+                f"File counter: {file_count}, highest entry: {highest_entry}, "
+                f"sequence: {sequence_count}. Seeding sequence to {last_used}..."
+            )
+            set_entry_counter(cur, last_used)
+            conn.commit()
+        print("Entry counter migrated to the database sequence.")
+    except Exception as e:
+        print(f"An error occurred while migrating the counter: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    migrate_counter()
@@ -0,0 +1,497 @@
+from database_helpers import connect_from_env
+
+# Arbitrary key for pg_advisory_lock so two deploys never migrate at once.
+MIGRATION_LOCK_ID = 72_410_001
+
+# Ordered schema history. A migration runs its "statements" in one
+# transaction, then builds its "indexes" -- (name, definition) pairs -- which
+# can use CREATE INDEX CONCURRENTLY so live tables stay writable. If an index
+# build fails the statements run again next time, so keep them idempotent.
+# Never edit an applied migration; append a new one instead.
+MIGRATIONS = [
+    {
+        "version": 1,
+        "name": "initial schema",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id SERIAL PRIMARY KEY,
+                user_name TEXT NOT NULL UNIQUE,
+                user_password TEXT NOT NULL
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                entry_id SERIAL PRIMARY KEY,
+                entry_data TEXT[],
+                is_milestone BOOLEAN DEFAULT FALSE,
+                creator_name TEXT,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS tags (
+                tag_id SERIAL PRIMARY KEY,
+                tag_name TEXT NOT NULL UNIQUE
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS img (
+                img_id SERIAL PRIMARY KEY,
+                img_name TEXT,
+                img_data TEXT,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id SERIAL PRIMARY KEY,
+                project_name TEXT NOT NULL UNIQUE
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS status_ (
+                status_id SERIAL PRIMARY KEY,
+                status_name TEXT NOT NULL UNIQUE
+            );
+            """,
+            # --- Junction Tables ---
+            """
+            CREATE TABLE IF NOT EXISTS entry_author (
+                entry_id INTEGER REFERENCES entries(entry_id) ON DELETE CASCADE,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                PRIMARY KEY (entry_id, user_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS entry_tags (
+                entry_id INTEGER REFERENCES entries(entry_id) ON DELETE CASCADE,
+                tag_id INTEGER REFERENCES tags(tag_id) ON DELETE CASCADE,
+                PRIMARY KEY (entry_id, tag_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS entry_imgs (
+                entry_id INTEGER REFERENCES entries(entry_id) ON DELETE CASCADE,
+                img_id INTEGER REFERENCES img(img_id) ON DELETE CASCADE,
+                PRIMARY KEY (entry_id, img_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS project_entries (
+                project_id INTEGER REFERENCES projects(project_id) ON DELETE CASCADE,
+                entry_id INTEGER REFERENCES entries(entry_id) ON DELETE CASCADE,
+                PRIMARY KEY (project_id, entry_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS project_tags (
+                project_id INTEGER REFERENCES projects(project_id) ON DELETE CASCADE,
+                tag_id INTEGER REFERENCES tags(tag_id) ON DELETE CASCADE,
+                PRIMARY KEY (project_id, tag_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS project_status (
+                project_id INTEGER REFERENCES projects(project_id) ON DELETE CASCADE,
+                status_id INTEGER REFERENCES status_(status_id) ON DELETE CASCADE,
+                PRIMARY KEY (project_id, status_id)
+            );
+            """,
+        ],
+    },
+    {
+        "version": 2,
+        "name": "secondary indexes for entry reads",
+        # users.user_name and projects.project_name are already covered by
+        # their UNIQUE constraints. The junction PKs lead with entry_id (or
+        # project_id), so the reverse direction needs its own index.
+        "indexes": [
+            (
+                "entries_created_at_entry_id_idx",
+                "entries (created_at DESC, entry_id DESC)",
+            ),
+            ("project_entries_entry_id_idx", "project_entries (entry_id, project_id)"),
+            ("entry_author_user_id_idx", "entry_author (user_id, entry_id)"),
+            ("entry_imgs_img_id_idx", "entry_imgs (img_id, entry_id)"),
+            ("entry_tags_tag_id_idx", "entry_tags (tag_id, entry_id)"),
+            ("project_tags_tag_id_idx", "project_tags (tag_id, project_id)"),
+        ],
+    },
+    {
+        "version": 3,
+        "name": "project name typeahead search",
+        "statements": ["CREATE EXTENSION IF NOT EXISTS pg_trgm;"],
+        "indexes": [
+            (
+                "projects_lower_name_idx",
+                "projects (lower(project_name) text_pattern_ops)",
+            ),
+            (
+                "projects_name_trgm_idx",
+                "projects USING gin (project_name gin_trgm_ops)",
+            ),
+        ],
+    },
+    {
+        "version": 4,
+        "name": "is_milestone on databases created before it existed",
+        "statements": [
+            "ALTER TABLE entries ADD COLUMN IF NOT EXISTS is_milestone BOOLEAN DEFAULT FALSE;"
+        ],
+    },
+    {
+        "version": 5,
+        "name": "full-text search over entries",
+        # A generated column cannot read the project name from another table,
+        # so search_vector is kept up to date by triggers instead: on the
+        # entry's own text, on linking it to a project and on renaming one.
+        "statements": [
+            "ALTER TABLE entries ADD COLUMN IF NOT EXISTS search_vector tsvector;",
+            """
+            CREATE OR REPLACE FUNCTION entry_search_vector(INTEGER, TEXT[])
+            RETURNS tsvector LANGUAGE sql STABLE AS $$
+                SELECT setweight(to_tsvector('english', coalesce((
+                           SELECT string_agg(p.project_name, ' ')
+                           FROM project_entries pe
+                           JOIN projects p ON p.project_id = pe.project_id
+                           WHERE pe.entry_id = $1
+                       ), '')), 'A')
+                    || setweight(to_tsvector('english',
+                           coalesce(array_to_string($2, ' '), '')), 'B');
+            $$;
+            """,
+            """
+            CREATE OR REPLACE FUNCTION entries_search_vector_trigger()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_vector := entry_search_vector(NEW.entry_id, NEW.entry_data);
+                RETURN NEW;
+            END;
+            $$;
+            """,
+            """
+            CREATE OR REPLACE FUNCTION project_entries_search_vector_trigger()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE entries e
+                SET search_vector = entry_search_vector(e.entry_id, e.entry_data)
+                WHERE e.entry_id = CASE TG_OP WHEN 'DELETE' THEN OLD.entry_id
+                                              ELSE NEW.entry_id END;
+                RETURN NULL;
+            END;
+            $$;
+            """,
+            """
+            CREATE OR REPLACE FUNCTION projects_search_vector_trigger()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE entries e
+                SET search_vector = entry_search_vector(e.entry_id, e.entry_data)
+                FROM project_entries pe
+                WHERE pe.project_id = NEW.project_id AND pe.entry_id = e.entry_id;
+                RETURN NULL;
+            END;
+            $$;
+            """,
+            "DROP TRIGGER IF EXISTS entries_search_vector ON entries;",
+            """
+            CREATE TRIGGER entries_search_vector
+            BEFORE INSERT OR UPDATE OF entry_data ON entries
+            FOR EACH ROW EXECUTE FUNCTION entries_search_vector_trigger();
+            """,
+            "DROP TRIGGER IF EXISTS project_entries_search_vector ON project_entries;",
+            """
+            CREATE TRIGGER project_entries_search_vector
+            AFTER INSERT OR DELETE ON project_entries
+            FOR EACH ROW EXECUTE FUNCTION project_entries_search_vector_trigger();
+            """,
+            "DROP TRIGGER IF EXISTS projects_search_vector ON projects;",
+            """
+            CREATE TRIGGER projects_search_vector
+            AFTER UPDATE OF project_name ON projects
+            FOR EACH ROW EXECUTE FUNCTION projects_search_vector_trigger();
+            """,
+            "UPDATE entries SET search_vector = entry_search_vector(entry_id, entry_data);",
+        ],
+        "indexes": [("entries_search_vector_idx", "entries USING gin (search_vector)")],
+    },
+    {
+        "version": 6,
+        "name": "entry_summary read model",
+        "statements": [
+            """
+            CREATE TABLE IF NOT EXISTS entry_summary (
+                entry_id INTEGER PRIMARY KEY REFERENCES entries(entry_id) ON DELETE CASCADE,
+                entry_data TEXT[],
+                creator_name TEXT,
+                created_at TIMESTAMPTZ,
+                created_at_display TEXT,
+                project_name TEXT,
+                authors TEXT[] NOT NULL DEFAULT '{}',
+                images TEXT[] NOT NULL DEFAULT '{}',
+                tags TEXT[] NOT NULL DEFAULT '{}'
+            );
+            """,
+            """
+            CREATE OR REPLACE FUNCTION refresh_entry_summary(ids INTEGER[])
+            RETURNS void LANGUAGE sql AS $$
+                INSERT INTO entry_summary AS s (
+                    entry_id, entry_data, creator_name, created_at, created_at_display,
+                    project_name, authors, images, tags
+                )
+                SELECT e.entry_id, e.entry_data, e.creator_name, e.created_at,
+                       to_char(e.created_at, 'FMMonth DD, YYYY - HH12:MI AM'),
+                       (
+                           SELECT string_agg(p.project_name, ', ' ORDER BY p.project_name)
+                           FROM project_entries pe
+                           JOIN projects p ON pe.project_id = p.project_id
+                           WHERE pe.entry_id = e.entry_id
+                       ),
+                       ARRAY(
+                           SELECT DISTINCT u.user_name
+                           FROM entry_author ea
+                           JOIN users u ON ea.user_id = u.user_id
+                           WHERE ea.entry_id = e.entry_id
+                           ORDER BY 1
+                       ),
+                       ARRAY(
+                           SELECT DISTINCT i.img_data
+                           FROM entry_imgs ei
+                           JOIN img i ON ei.img_id = i.img_id
+                           WHERE ei.entry_id = e.entry_id AND i.img_data IS NOT NULL
+                           ORDER BY 1
+                       ),
+                       ARRAY(
+                           SELECT t.tag_name
+                           FROM entry_tags et
+                           JOIN tags t ON et.tag_id = t.tag_id
+                           WHERE et.entry_id = e.entry_id
+                           ORDER BY 1
+                       )
+                FROM entries e
+                WHERE e.entry_id = ANY(ids)
+                ON CONFLICT (entry_id) DO UPDATE SET
+                    entry_data = EXCLUDED.entry_data,
+                    creator_name = EXCLUDED.creator_name,
+                    created_at = EXCLUDED.created_at,
+                    created_at_display = EXCLUDED.created_at_display,
+                    project_name = EXCLUDED.project_name,
+                    authors = EXCLUDED.authors,
+                    images = EXCLUDED.images,
+                    tags = EXCLUDED.tags;
+            $$;
+            """,
+            # Every trigger below names its transition table "changed", so one
+            # function serves all tables that carry an entry_id.
+            """
+            CREATE OR REPLACE FUNCTION entry_summary_trigger()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                PERFORM refresh_entry_summary(ARRAY(SELECT DISTINCT entry_id FROM changed));
+                RETURN NULL;
+            END;
+            $$;
+            """,
+            """
+            CREATE OR REPLACE FUNCTION entry_summary_project_trigger()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                PERFORM refresh_entry_summary(ARRAY(
+                    SELECT DISTINCT pe.entry_id
+                    FROM changed JOIN project_entries pe USING (project_id)
+                ));
+                RETURN NULL;
+            END;
+            $$;
+            """,
+            # Transition tables allow one event per trigger. Deleting an entry
+            # removes its summary through the foreign key.
+            *(
+                statement
+                for table, event, transition in [
+                    ("entries", "INSERT", "NEW"),
+                    ("entries", "UPDATE", "NEW"),
+                    *(
+                        (table, event, transition)
+                        for table in (
+                            "entry_author",
+                            "entry_imgs",
+                            "entry_tags",
+                            "project_entries",
+                        )
+                        for event, transition in [
+                            ("INSERT", "NEW"),
+                            ("UPDATE", "NEW"),
+                            ("DELETE", "OLD"),
+                        ]
+                    ),
+                ]
+                for statement in (
+                    f"DROP TRIGGER IF EXISTS {table}_summary_{event.lower()} ON {table};",
+                    f"""
+                    CREATE TRIGGER {table}_summary_{event.lower()}
+                    AFTER {event} ON {table}
+                    REFERENCING {transition} TABLE AS changed
+                    FOR EACH STATEMENT EXECUTE FUNCTION entry_summary_trigger();
+                    """,
+                )
+            ),
+            "DROP TRIGGER IF EXISTS projects_summary_update ON projects;",
+            """
+            CREATE TRIGGER projects_summary_update
+            AFTER UPDATE ON projects
+            REFERENCING NEW TABLE AS changed
+            FOR EACH STATEMENT EXECUTE FUNCTION entry_summary_project_trigger();
+            """,
+            "SELECT refresh_entry_summary(ARRAY(SELECT entry_id FROM entries));",
+        ],
+        "indexes": [
+            (
+                "entry_summary_created_at_entry_id_idx",
+                "entry_summary (created_at DESC, entry_id DESC)",
+            ),
+            ("entry_summary_tags_idx", "entry_summary USING gin (tags)"),
+        ],
+    },
+    {
+        "version": 7,
+        "name": "entry_summary sort and filter indexes",
+        # Equality filters lead with the filtered column and then follow the
+        # default created_at order, so a filtered page is one range scan. The
+        # author filter tests array containment, which needs GIN.
+        "indexes": [
+            (
+                "entry_summary_project_created_at_idx",
+                "entry_summary (project_name, created_at DESC, entry_id DESC)",
+            ),
+            (
+                "entry_summary_creator_created_at_idx",
+                "entry_summary (creator_name, created_at DESC, entry_id DESC)",
+            ),
+            ("entry_summary_authors_idx", "entry_summary USING gin (authors)"),
+            ("entry_summary_authors_entry_id_idx", "entry_summary (authors, entry_id)"),
+        ],
+    },
+    {
+        "version": 8,
+        "name": "notebook version watermark",
+        "statements": [
+            # A single row; the CHECK keeps a second one from being inserted.
+            """
+            CREATE TABLE IF NOT EXISTS notebook_version (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """,
+            """
+            INSERT INTO notebook_version (version, updated_at)
+            SELECT 1, coalesce(max(created_at), now()) FROM entries
+            ON CONFLICT (id) DO NOTHING;
+            """,
+        ],
+    },
+]
+
+
+def _applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ DEFAULT NOW()
+        );
+    """)
+    cur.execute("SELECT version FROM schema_migrations;")
+    return {row[0] for row in cur.fetchall()}
+
+
+def _create_indexes(conn, indexes, concurrently):
+    """
+    Builds each index, one statement at a time. CONCURRENTLY cannot run in a
+    transaction, so this uses autocommit; an index left INVALID by an earlier
+    interrupted build is dropped and rebuilt.
+    """
+    keyword = "CONCURRENTLY" if concurrently else ""
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for name, definition in indexes:
+                cur.execute(
+                    """
+                    SELECT i.indisvalid FROM pg_index i
+                    WHERE i.indexrelid = to_regclass(%s);
+                """,
+                    (name,),
+                )
+                row = cur.fetchone()
+                if row and not row[0]:
+                    print(f"Dropping invalid index {name}...")
+                    cur.execute(f"DROP INDEX {keyword} IF EXISTS {name};")
+                print(f"Creating index {name}...")
+                cur.execute(
+                    f"CREATE INDEX {keyword} IF NOT EXISTS {name} ON {definition};"
+                )
+    finally:
+        conn.autocommit = False
+
+
+def run_migrations(conn, concurrently=True):
+    """
+    Applies every migration newer than the versions recorded in
+    schema_migrations, in order. Returns the versions that were applied.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+    applied_now = []
+    try:
+        with conn.cursor() as cur:
+            applied = _applied_versions(cur)
+            conn.commit()
+
+        for migration in sorted(MIGRATIONS, key=lambda m: m["version"]):
+            if migration["version"] in applied:
+                continue
+            print(f"Applying migration {migration['version']}: {migration['name']}...")
+            with conn.cursor() as cur:
+                for statement in migration.get("statements", []):
+                    cur.execute(statement)
+            conn.commit()
+            if "indexes" in migration:
+                _create_indexes(conn, migration["indexes"], concurrently)
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                    (migration["version"], migration["name"]),
+                )
+            conn.commit()
+            applied_now.append(migration["version"])
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+    return applied_now
+
+
+def migrate(concurrently=True):
+    """Connects to the database and brings the schema up to date."""
+    conn = None
+    try:
+        conn = connect_from_env()
+        applied = run_migrations(conn, concurrently=concurrently)
+        if applied:
+            print(f"Applied migrations: {applied}")
+        else:
+            print("Database schema is already up to date.")
+    finally:
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
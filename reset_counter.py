@@ -1,24 +1,45 @@
-import hickle as hkl
-import os
+from database_helpers import connect_from_env
 
-# The file that stores the entry count
-COUNTER_FILE = "entrys"
+# Entry numbers come from the sequence behind entries.entry_id.
+SEQUENCE_SQL = "pg_get_serial_sequence('entries', 'entry_id')"
+
+
+def set_entry_counter(cur, last_used):
+    """Positions the entry sequence so the next entry gets last_used + 1."""
+    if last_used < 1:
+        cur.execute(f"SELECT setval({SEQUENCE_SQL}, 1, false);")
+    else:
+        cur.execute(f"SELECT setval({SEQUENCE_SQL}, %s, true);", (last_used,))
 
 
 def reset_counter():
-    """Resets the entry counter to zero."""
+    """
+    Resets the entry counter. Numbers still held by existing entries can't be
+    reused, so the counter restarts just after the highest remaining entry.
+    """
+    conn = None
     try:
-        print(f"Resetting counter in file '{COUNTER_FILE}' to 0...")
-        hkl.dump(0, COUNTER_FILE, mode="w")
+        conn = connect_from_env()
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(entry_id), 0) FROM entries;")
+            highest = cur.fetchone()[0]
+            print(f"Resetting entry counter to {highest}...")
+            set_entry_counter(cur, highest)
+            conn.commit()
         print("Counter has been successfully reset.")
     except Exception as e:
         print(f"An error occurred while resetting the counter: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            conn.close()
 
 
 if __name__ == "__main__":
     if (
         input(
-            f"Are you sure you want to reset the entry counter file '{COUNTER_FILE}' to 0? (yes/no): "
+            "Are you sure you want to reset the entry counter sequence? (yes/no): "
         ).lower()
         == "yes"
     ):
@@ -0,0 +1,328 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import logging
+import sqlite3
+import threading
+from google_sheets_client import append_scout_rows
+from gsheet import append_outreach_rows
+
+logger = logging.getLogger(__name__)
+
+
+def _is_permanent(error):
+    """
+    Whether a writer error means the API rejected the request itself (a 4xx
+    other than auth, timeout or quota), so sending it again cannot succeed.
+    Errors without an HTTP status are treated as transient.
+    """
+    response = getattr(error, "response", None)  # gspread APIError
+    status = getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)  # HttpError
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+
+class WriteBehindSpool:
+    """
+    Durable write-behind buffer for spreadsheet appends. Rows are committed to
+    an SQLite file first, then a flusher thread hands every pending row for a
+    target to its writer in one multi-row call, every flush_interval seconds
+    or as soon as batch_size rows are waiting. Rows survive restarts and
+    outages and are retried until the writer succeeds.
+
+    Several processes may share the file: a flush first claims its rows, so
+    each row is sent by one process. A claim older than claim_timeout (a
+    process that died mid-flush) is released for another attempt.
+
+    After a failed flush a target backs off exponentially, up to max_backoff
+    seconds, and only its oldest row is sent until one goes through, so a
+    bad row fails by itself rather than sinking every batch. Outages and
+    quota errors are retried for as long as they last; only a row the API
+    rejects outright (see _is_permanent) is moved to the dead_rows table,
+    from which replay_dead_rows puts it back in the queue.
+    """
+
+    def __init__(
+        self,
+        path,
+        flush_interval=5.0,
+        batch_size=20,
+        claim_timeout=300,
+        max_backoff=600,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self.max_backoff = max_backoff
+        self._failures = {}  # target -> consecutive failed flushes
+        self._retry_at = {}  # target -> time.monotonic() of its next attempt
+        self._writers = {}
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.counters = {
+            "queued": 0,
+            "flushed": 0,
+            "failed_flushes": 0,
+            "dead_lettered": 0,
+        }
+
+    def register(self, target, write_rows):
+        """Sets the function that appends a list of rows to a target."""
+        self._writers[target] = write_rows
+
+    def _connection(self):
+        # sqlite3 connections must not cross a fork, so each process opens its own.
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_rows (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    target TEXT NOT NULL,
+                    row TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                );
+                """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_rows (
+                    id INTEGER PRIMARY KEY,
+                    target TEXT NOT NULL,
+                    row TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    error TEXT,
+                    failed_at REAL NOT NULL
+                );
+                """)
+            self._conn.commit()
+            self._pid = os.getpid()
+            self._start_flusher()
+        return self._conn
+
+    def _start_flusher(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sheet-spool-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def start(self):
+        """Starts flushing in this process, picking up rows left by a previous run."""
+        with self._lock:
+            self._connection()
+
+    def enqueue(self, target, row):
+        """Durably queues one row for a target. Returns once it is on disk."""
+        if target not in self._writers:
+            raise ValueError(f"No writer registered for {target!r}")
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO pending_rows (target, row) VALUES (?, ?);",
+                (target, json.dumps(row)),
+            )
+            conn.commit()
+            self.counters["queued"] += 1
+            pending = conn.execute(
+                "SELECT count(*) FROM pending_rows WHERE claimed_by IS NULL;"
+            ).fetchone()[0]
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _claim(self, target, token):
+        """Claims a target's pending rows, or only the oldest while it is failing."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                """
+                UPDATE pending_rows SET claimed_by = ?, claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM pending_rows
+                    WHERE target = ?
+                      AND (claimed_by IS NULL OR claimed_at < ?)
+                    ORDER BY id
+                    LIMIT ?
+                );
+                """,
+                (
+                    token,
+                    time.time(),
+                    target,
+                    time.time() - self.claim_timeout,
+                    # A LIMIT of -1 means no limit in SQLite.
+                    1 if self._failures.get(target) else -1,
+                ),
+            )
+            conn.commit()
+            return conn.execute(
+                "SELECT id, row FROM pending_rows WHERE claimed_by = ? ORDER BY id;",
+                (token,),
+            ).fetchall()
+
+    def _backing_off(self, target):
+        with self._lock:
+            return time.monotonic() < self._retry_at.get(target, 0)
+
+    def _failed(self, target, token, ids, error):
+        """
+        Releases a failed claim and backs the target off. A row sent on its
+        own that failed with a permanent error is moved to dead_rows.
+        """
+        with self._lock:
+            failures = self._failures.get(target, 0) + 1
+            self._failures[target] = failures
+            delay = min(self.max_backoff, self.flush_interval * 2**failures)
+            self._retry_at[target] = time.monotonic() + delay
+            self.counters["failed_flushes"] += 1
+            self._conn.execute(
+                "UPDATE pending_rows SET claimed_by = NULL, "
+                "attempts = attempts + 1 WHERE claimed_by = ?;",
+                (token,),
+            )
+            dead = None
+            if len(ids) == 1 and _is_permanent(error):
+                dead = self._conn.execute(
+                    "SELECT row FROM pending_rows WHERE id = ?;", ids
+                ).fetchone()
+            if dead:
+                self._conn.execute(
+                    "INSERT INTO dead_rows (id, target, row, attempts, error, failed_at) "
+                    "SELECT id, target, row, attempts, ?, ? FROM pending_rows "
+                    "WHERE id = ?;",
+                    (repr(error), time.time(), ids[0]),
+                )
+                self._conn.execute("DELETE FROM pending_rows WHERE id = ?;", ids)
+                self.counters["dead_lettered"] += 1
+                # The rejected row is out of the way; try the rest right away.
+                self._failures.pop(target, None)
+                self._retry_at.pop(target, None)
+            self._conn.commit()
+        if dead:
+            logger.error(f"Moved a rejected {target} row to dead_rows: {dead[0]}")
+        return delay
+
+    def flush(self, force=False):
+        """
+        Sends pending rows, one writer call per target, skipping targets that
+        are backing off unless force is set. Returns rows sent.
+        """
+        sent = 0
+        for target, write_rows in self._writers.items():
+            if not force and self._backing_off(target):
+                continue
+            token = f"{os.getpid()}:{uuid.uuid4().hex}"
+            claimed = self._claim(target, token)
+            if not claimed:
+                continue
+            ids = [row_id for row_id, _ in claimed]
+            try:
+                write_rows([json.loads(row) for _, row in claimed])
+            except Exception as e:
+                delay = self._failed(target, token, ids, e)
+                logger.error(
+                    f"Flushing {len(ids)} {target} rows failed, "
+                    f"retrying in {delay:.0f}s: {e}"
+                )
+                continue
+            with self._lock:
+                self._failures.pop(target, None)
+                self._retry_at.pop(target, None)
+                self._conn.execute(
+                    "DELETE FROM pending_rows WHERE claimed_by = ?;", (token,)
+                )
+                self._conn.commit()
+                self.counters["flushed"] += len(ids)
+            sent += len(ids)
+        return sent
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Sheet spool flush raised: {e}")
+
+    def replay_dead_rows(self, target=None):
+        """
+        Moves dead-lettered rows (of one target, or all) back into the queue
+        with their attempts reset, e.g. once the sheet is fixed. Returns how
+        many rows were moved.
+        """
+        where, params = ("WHERE target = ?", (target,)) if target else ("", ())
+        with self._lock:
+            conn = self._connection()
+            moved = conn.execute(
+                "INSERT INTO pending_rows (target, row) "
+                f"SELECT target, row FROM dead_rows {where} ORDER BY id;",
+                params,
+            ).rowcount
+            conn.execute(f"DELETE FROM dead_rows {where};", params)
+            conn.commit()
+        if moved:
+            self._wake.set()
+        return moved
+
+    def stats(self):
+        """Returns pending and dead row counts per target and flush counters."""
+        with self._lock:
+            conn = self._connection()
+            pending = dict(
+                conn.execute(
+                    "SELECT target, count(*) FROM pending_rows GROUP BY target;"
+                ).fetchall()
+            )
+            dead = dict(
+                conn.execute(
+                    "SELECT target, count(*) FROM dead_rows GROUP BY target;"
+                ).fetchall()
+            )
+            backing_off = {
+                target: round(retry_at - time.monotonic(), 1)
+                for target, retry_at in self._retry_at.items()
+                if retry_at > time.monotonic()
+            }
+            return {
+                "pending": pending,
+                "dead": dead,
+                "backing_off": backing_off,
+                **self.counters,
+            }
+
+    def shutdown(self):
+        """Makes a last attempt to send pending rows before the process exits."""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(self.flush_interval)
+        try:
+            self.flush(force=True)
+        except Exception as e:
+            logger.error(f"Final sheet spool flush failed: {e}")
+
+
+# Scouting and outreach rows are buffered here so a burst of submissions
+# becomes one append per sheet instead of one API call per row.
+sheet_appends = WriteBehindSpool(
+    os.environ.get("SHEET_SPOOL_PATH", "sheet_spool.sqlite3"),
+    flush_interval=float(os.environ.get("SHEET_FLUSH_INTERVAL", 5)),
+    batch_size=int(os.environ.get("SHEET_FLUSH_ROWS", 20)),
+)
+sheet_appends.register("scouting", append_scout_rows)
+sheet_appends.register("outreach", append_outreach_rows)
+atexit.register(sheet_appends.shutdown)
@@ -1,50 +1,24 @@
-import time
 from slack_helpers import (
     open_new_entry_modal,
     open_outreach_modal,
     send_ftc_team_info,
+    send_tagged_entries,
+    send_search_results,
 )
-from ftc_scout_api import fetch_team_stats, get_best_stats
+from ftc_scout_api import fetch_many_team_stats, get_best_stats
 from google_sheets_client import (
     init_google_sheets,
     get_all_teams,
-    get_scouted_teams,
     update_opr_sheet,
 )
 
 
 def open_scout_modal(trigger_id, client, logger):
-    """Opens or updates the scouting modal with team data."""
-    loading_view = {
-        "type": "modal",
-        "callback_id": "loading-modal",
-        "title": {"type": "plain_text", "text": "Loading Teams"},
-        "blocks": [
-            {
-                "type": "section",
-                "text": {"type": "mrkdwn", "text": "Loading available teams..."},
-            }
-        ],
-    }
+    """
+    Opens the scouting modal. Teams are searched through the
+    team_select_action options handler, so nothing is read from Sheets here.
+    """
     try:
-        loading_response = client.views_open(trigger_id=trigger_id, view=loading_view)
-        view_id = loading_response["view"]["id"]
-
-        if not init_google_sheets():
-            raise ConnectionError("Could not connect to Google Sheets.")
-
-        all_teams = get_all_teams()
-        scouted_teams = get_scouted_teams()
-
-        team_options = [
-            {
-                "text": {"type": "plain_text", "text": f"{team[1]} - {team[0]}"},
-                "value": str(team[1]),
-            }
-            for team in all_teams
-            if str(team[1]) not in scouted_teams
-        ][:100]
-
         from slack_helpers import (
             get_spec_auto_options,
             get_sample_auto_options,
@@ -61,9 +35,12 @@ def open_scout_modal(trigger_id, client, logger):
                     "type": "input",
                     "block_id": "team_block",
                     "element": {
-                        "type": "static_select",
-                        "placeholder": {"type": "plain_text", "text": "Select a team"},
-                        "options": team_options,
+                        "type": "external_select",
+                        "placeholder": {
+                            "type": "plain_text",
+                            "text": "Search by team number or name",
+                        },
+                        "min_query_length": 0,
                         "action_id": "team_select_action",
                     },
                     "label": {"type": "plain_text", "text": "Select Team"},
@@ -203,21 +180,9 @@ def open_scout_modal(trigger_id, client, logger):
                 },
             ],
         }
-        client.views_update(view_id=view_id, view=view_payload)
+        client.views_open(trigger_id=trigger_id, view=view_payload)
     except Exception as e:
-        logger.error(f"Error creating scout modal: {e}")
-        error_view = {
-            "type": "modal",
-            "title": {"type": "plain_text", "text": "Error"},
-            "blocks": [
-                {
-                    "type": "section",
-                    "text": {"type": "mrkdwn", "text": f"An error occurred: {e}"},
-                }
-            ],
-        }
-        if "view_id" in locals():
-            client.views_update(view_id=view_id, view=error_view)
+        logger.error(f"Error opening scout modal: {e}")
 
 
 def update_oprs_and_notify(body, logger, client):
@@ -242,13 +207,36 @@ def update_oprs_and_notify(body, logger, client):
             "DC OPR",
             "Ascent",
         ]
+        team_numbers = [row[1].strip() for row in all_teams if row[1].strip()]
+        channel_id = body["channel_id"]
+        progress = client.chat_postMessage(
+            channel=channel_id,
+            text=f"Refreshing OPR stats: 0/{len(team_numbers)} teams...",
+        )
+
+        def report_progress(done, total):
+            try:
+                client.chat_update(
+                    channel=progress["channel"],
+                    ts=progress["ts"],
+                    text=f"Refreshing OPR stats: {done}/{total} teams...",
+                )
+            except Exception as e:
+                logger.warning(f"Could not update OPR progress message: {e}")
+
+        # `/updateoprs refresh` ignores cached ftcscout responses.
+        all_stats, fetch_errors = fetch_many_team_stats(
+            team_numbers,
+            on_progress=report_progress,
+            force_refresh=body.get("text", "").strip() == "refresh",
+        )
+
         updated_rows = []
-        errors = []
-        for row in all_teams:
-            team_number = row[1].strip()
-            if not team_number:
+        errors = [f"Team {team}: {error}" for team, error in fetch_errors.items()]
+        for team_number in team_numbers:
+            if team_number in fetch_errors:
                 continue
-            stats = fetch_team_stats(team_number)
+            stats = all_stats.get(team_number)
             if not stats or not stats.get("events"):
                 errors.append(f"No stats found for team {team_number}")
                 continue
@@ -266,13 +254,15 @@ def update_oprs_and_notify(body, logger, client):
                 best_stats["dcParkPointsIndividual"],
             ]
             updated_rows.append(new_row)
-            time.sleep(0.2)
 
-        update_opr_sheet(header_row, updated_rows)
-        message = f"Successfully updated OPR stats for {len(updated_rows)} teams!"
+        cells_written = update_opr_sheet(header_row, updated_rows)
+        message = (
+            f"Successfully updated OPR stats for {len(updated_rows)} teams! "
+            f"({cells_written} cells changed)"
+        )
         if errors:
             message += f"\nEncountered {len(errors)} errors:\n" + "\n".join(errors[:5])
-        client.chat_postMessage(channel=body["channel_id"], text=message)
+        client.chat_update(channel=progress["channel"], ts=progress["ts"], text=message)
 
     except Exception as e:
         logger.error(f"Error updating OPRs: {e}")
@@ -304,6 +294,16 @@ def register_commands(app):
         ack()
         send_ftc_team_info(body, client)
 
+    @app.command("/tags")
+    def handle_tags_command(ack, body, client):
+        ack()
+        send_tagged_entries(body, client)
+
+    @app.command("/search")
+    def handle_search_command(ack, body, client):
+        ack()
+        send_search_results(body, client)
+
     @app.command("/en")
     def handle_en_command(ack, body, client):
         ack()
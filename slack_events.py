@@ -1,6 +1,5 @@
 from datetime import datetime, timezone, timedelta
 import json
-import hickle as hkl
 from slack_helpers import (
     open_prog_modal,
     open_mech_modal,
@@ -9,71 +8,74 @@ from slack_helpers import (
     send_confirmation_message,
     send_programming_update,
     send_mechanical_update,
+    get_project_options,
 )
-from gsheet import outreach_upload
-from google_sheets_client import append_scout_data, get_all_teams
-from database_helpers import enter_data as run_db_upload
+from google_sheets_client import (
+    get_team_row,
+    search_unscouted_teams,
+)
+from sheet_spool import sheet_appends
+from database_helpers import enter_data as run_db_upload, TRANSIENT_DB_ERRORS
+from job_queue import background_jobs
+from user_directory import get_real_name, get_real_names, update_user
 
 
 def process_entry_submission(body, logger, client, category):
-    """A generic function to process both mech and prog submissions."""
-    try:
-        entry_number = hkl.load("entrys") + 1
-        hkl.dump(entry_number, "entrys")
-
-        values = body["view"]["state"]["values"]
-        submitting_user_info = client.users_info(user=body["user"]["id"])
-        submitting_user_name = submitting_user_info["user"]["real_name"]
-
-        project_selection = values["project_block"]["project_select"]["selected_option"]
-        project_name = ""
-        if project_selection and project_selection["value"] == "_new_":
-            project_name = values["new_project_block"]["new_project_name"]["value"]
-            if not project_name:
-                client.chat_postMessage(
-                    channel=body["user"]["id"],
-                    text="Error: You selected 'Create New Project' but did not provide a name.",
-                )
-                return
-        elif project_selection:
-            project_name = project_selection["value"]
-        else:
+    """
+    A generic function to process both mech and prog submissions.
+    Runs on a background worker; transient database errors are retried by
+    the job queue, so notifications after the commit must not raise.
+    """
+    values = body["view"]["state"]["values"]
+    submitting_user_name = get_real_name(client, body["user"]["id"])
+
+    project_selection = values["project_block"]["project_select"]["selected_option"]
+    project_name = ""
+    if project_selection and project_selection["value"] == "_new_":
+        project_name = values["new_project_block"]["new_project_name"]["value"]
+        if not project_name:
             client.chat_postMessage(
                 channel=body["user"]["id"],
-                text="Error: You must select a project or create a new one.",
+                text="Error: You selected 'Create New Project' but did not provide a name.",
             )
             return
+    elif project_selection:
+        project_name = project_selection["value"]
+    else:
+        client.chat_postMessage(
+            channel=body["user"]["id"],
+            text="Error: You must select a project or create a new one.",
+        )
+        return
+
+    user_ids = values["users_block"]["users_select"]["selected_users"]
+    what_you_did = values["did_block"]["did_input"]["value"]
+    what_do_next = values["next_block"]["next_input"]["value"]
+    files = values["files_block"]["file_input"].get("files", [])
+
+    user_info_list = get_real_names(client, user_ids)
 
-        user_ids = values["users_block"]["users_select"]["selected_users"]
-        what_you_did = values["did_block"]["did_input"]["value"]
-        what_do_next = values["next_block"]["next_input"]["value"]
-        files = values["files_block"]["file_input"].get("files", [])
-
-        user_info_list = [
-            client.users_info(user=uid)["user"]["real_name"] for uid in user_ids
-        ]
-
-        submission_data = {
-            "project_name": project_name,
-            "category": category,
-            "entry_id": entry_number,
-            "entry_time": datetime.now(timezone(timedelta(hours=-7))).strftime("%c"),
-            "submitting_user": submitting_user_name,
-            "selected_users": user_info_list,
-            "what_did": what_you_did,
-            "what_next": what_do_next,
-            "files": [
-                {"file_name": f["name"], "file_url": f["url_private"]} for f in files
-            ],
-        }
-
-        run_db_upload(submission_data, client, submitting_user_name)
+    submission_data = {
+        "project_name": project_name,
+        "category": category,
+        "entry_time": datetime.now(timezone(timedelta(hours=-7))).strftime("%c"),
+        "submitting_user": submitting_user_name,
+        "selected_users": user_info_list,
+        "what_did": what_you_did,
+        "what_next": what_do_next,
+        "files": [
+            {"file_name": f["name"], "file_url": f["url_private"]} for f in files
+        ],
+    }
 
+    entry_number = run_db_upload(submission_data)
+
+    try:
         send_done_message(client, submitting_user_name, submission_data["entry_time"])
         send_confirmation_message(
             client,
             "C07QFDDS9QW",
-            f"New {category} entry for '{project_name}' submitted to database.",
+            f"New {category} entry #{entry_number} for '{project_name}' submitted to database.",
         )
 
         file_urls = [f["url_private"] for f in files]
@@ -95,15 +97,69 @@ def process_entry_submission(body, logger, client, category):
                 what_do_next,
                 file_urls,
             )
-
     except Exception as e:
-        logger.error(f"Error processing {category} submission: {e}")
+        logger.error(f"Error sending {category} notifications: {e}")
+
+
+def enqueue_entry_submission(ack, body, logger, client, category):
+    """Queues an entry submission for a background worker, then closes the modal."""
+
+    def notify_failure(error):
+        # Runs once, after the last attempt, so the channel sees one report.
+        client.chat_postMessage(
+            channel="#engineering-notebook",
+            text=f"Entry submission by {body['user'].get('name', body['user']['id'])} "
+            f"failed; nothing was saved.\n*Error:*\n```{error}```",
+        )
         client.chat_postMessage(
-            channel=body["user"]["id"], text=f"An error occurred: {e}"
+            channel=body["user"]["id"], text=f"An error occurred: {error}"
+        )
+
+    queued = background_jobs.submit(
+        process_entry_submission,
+        body,
+        logger,
+        client,
+        category,
+        on_failure=notify_failure,
+        retry_on=TRANSIENT_DB_ERRORS,
+    )
+    if queued:
+        ack()
+    else:
+        # Keep the modal open so the user's text isn't lost.
+        ack(
+            response_action="errors",
+            errors={"did_block": "The bot is busy right now, please submit again."},
         )
 
 
 def register_events(app):
+    @app.event("user_change")
+    def handle_user_change(event):
+        update_user(event["user"])
+
+    @app.options("project_select")
+    def handle_project_options(ack, payload):
+        ack(options=get_project_options(payload.get("value", "")))
+
+    @app.options("team_select_action")
+    def handle_team_options(ack, payload, logger):
+        try:
+            teams = search_unscouted_teams(payload.get("value", ""))
+        except Exception as e:
+            logger.error(f"Error searching teams: {e}")
+            teams = []
+        ack(
+            options=[
+                {
+                    "text": {"type": "plain_text", "text": f"{number} - {name}"[:75]},
+                    "value": number,
+                }
+                for number, name in teams
+            ]
+        )
+
     @app.action("category_action_id")
     def handle_category_clicks(ack):
         ack()
@@ -129,13 +185,11 @@ def register_events(app):
 
     @app.view("mech-modal-identifier")
     def handle_mech_modal_submission(ack, body, logger, client):
-        ack()
-        process_entry_submission(body, logger, client, "mechanical")
+        enqueue_entry_submission(ack, body, logger, client, "mechanical")
 
     @app.view("prog-modal-identifier")
     def handle_prog_modal_submission(ack, body, logger, client):
-        ack()
-        process_entry_submission(body, logger, client, "programming")
+        enqueue_entry_submission(ack, body, logger, client, "programming")
 
     @app.view("outreach-modal-identifier")
     def handle_outreach_submission(ack, body, logger, client):
@@ -151,9 +205,7 @@ def register_events(app):
             indiv_hours = values["hours_block"]["hours_input"]["value"]
             affected_people = values["people_block"]["people_input"]["value"]
             user_info_list = [
-                client.users_info(user=uid)["user"]["real_name"]
-                for uid in user_ids
-                if client.users_info(user=uid)["ok"]
+                user_name for user_name in get_real_names(client, user_ids) if user_name
             ]
             team_hours = len(user_info_list) * float(indiv_hours)
             submission_data = [
@@ -164,11 +216,12 @@ def register_events(app):
                 str(team_hours),
                 affected_people,
             ]
-            result = outreach_upload(submission_data, client)
+            # Queued durably; the spool appends it to the sheet shortly.
+            sheet_appends.enqueue("outreach", submission_data)
             send_confirmation_message(
                 client,
                 "C07QFDDS9QW",
-                f"Outreach event '{name}' logged successfully. Cells updated: {result}",
+                f"Outreach event '{name}' logged successfully.",
             )
         except Exception as e:
             logger.error(f"Error in outreach submission: {e}")
@@ -182,20 +235,14 @@ def register_events(app):
         ack()
         try:
             values = body["view"]["state"]["values"]
-            submitting_user_info = client.users_info(user=body["user"]["id"])
             submitting_user = (
-                submitting_user_info["user"]["real_name"]
-                if submitting_user_info["ok"]
-                else "Unknown User"
+                get_real_name(client, body["user"]["id"]) or "Unknown User"
             )
             team_number = values["team_block"]["team_select_action"]["selected_option"][
                 "value"
             ]
-            all_teams = get_all_teams()
-            team_name = next(
-                (team[0] for team in all_teams if team[1] == team_number),
-                "Unknown Team",
-            )
+            team_row = get_team_row(team_number)
+            team_name = team_row[0] if team_row else "Unknown Team"
             new_row = [
                 submitting_user,
                 team_number,
@@ -219,7 +266,10 @@ def register_events(app):
                 values["contact_block"]["contact_action"]["value"],
                 values["notes_block"]["notes_action"]["value"],
             ]
-            append_scout_data(new_row)
+            # Queued durably; the spool appends it to the sheet shortly, and
+            # append_scout_rows takes the team out of the typeahead once the
+            # row is actually written.
+            sheet_appends.enqueue("scouting", new_row)
             send_confirmation_message(
                 client,
                 "C07QFDDS9QW",
@@ -1,6 +1,12 @@
 from datetime import datetime, timezone, timedelta
 from ftc_scout_api import ftc
-from database_helpers import fetch_all_projects
+from database_helpers import (
+    search_projects,
+    fetch_entries_page,
+    search_entries,
+    HIGHLIGHT_START,
+    HIGHLIGHT_STOP,
+)
 
 # --- Message Sending Functions ---
 
@@ -131,6 +137,34 @@ def get_tele_options():
     return options
 
 
+NEW_PROJECT_OPTION = {
+    "text": {"type": "plain_text", "text": "Create New Project..."},
+    "value": "_new_",
+}
+
+
+def get_project_options(query):
+    """Options for the project typeahead: matching projects, then "create new"."""
+    return [
+        {"text": {"type": "plain_text", "text": name[:75]}, "value": name}
+        for name in search_projects(query)
+    ] + [NEW_PROJECT_OPTION]
+
+
+def project_select_element():
+    """
+    The project picker. Options are loaded by the project_select options
+    handler as the user types, so the view payload does not grow with the
+    number of projects.
+    """
+    return {
+        "type": "external_select",
+        "action_id": "project_select",
+        "placeholder": {"type": "plain_text", "text": "Search for a project"},
+        "min_query_length": 0,
+    }
+
+
 # --- Modal Opening Functions ---
 
 
@@ -174,10 +208,6 @@ def open_new_entry_modal(trigger_id, client):
 
 def open_mech_modal(trigger_id, client):
     """Opens the modal for a mechanical entry."""
-    projects = fetch_all_projects()
-    project_options = [
-        {"text": {"type": "plain_text", "text": p}, "value": p} for p in projects
-    ]
     client.views_open(
         trigger_id=trigger_id,
         view={
@@ -190,24 +220,7 @@ def open_mech_modal(trigger_id, client):
                     "type": "input",
                     "block_id": "project_block",
                     "label": {"type": "plain_text", "text": "Project"},
-                    "element": {
-                        "type": "static_select",
-                        "action_id": "project_select",
-                        "placeholder": {
-                            "type": "plain_text",
-                            "text": "Select a project",
-                        },
-                        "options": project_options
-                        + [
-                            {
-                                "text": {
-                                    "type": "plain_text",
-                                    "text": "Create New Project...",
-                                },
-                                "value": "_new_",
-                            }
-                        ],
-                    },
+                    "element": project_select_element(),
                 },
                 {
                     "type": "input",
@@ -268,10 +281,6 @@ def open_mech_modal(trigger_id, client):
 
 def open_prog_modal(trigger_id, client):
     """Opens the modal for a programming entry."""
-    projects = fetch_all_projects()
-    project_options = [
-        {"text": {"type": "plain_text", "text": p}, "value": p} for p in projects
-    ]
     client.views_open(
         trigger_id=trigger_id,
         view={
@@ -284,24 +293,7 @@ def open_prog_modal(trigger_id, client):
                     "type": "input",
                     "block_id": "project_block",
                     "label": {"type": "plain_text", "text": "Project"},
-                    "element": {
-                        "type": "static_select",
-                        "action_id": "project_select",
-                        "placeholder": {
-                            "type": "plain_text",
-                            "text": "Select a project",
-                        },
-                        "options": project_options
-                        + [
-                            {
-                                "text": {
-                                    "type": "plain_text",
-                                    "text": "Create New Project...",
-                                },
-                                "value": "_new_",
-                            }
-                        ],
-                    },
+                    "element": project_select_element(),
                 },
                 {
                     "type": "input",
@@ -428,9 +420,13 @@ def open_outreach_modal(trigger_id, client):
 
 
 def send_ftc_team_info(body, client):
-    """Fetches and sends information about a specific FTC team."""
-    team_number = body["text"]
-    team_data = ftc(team_number)
+    """
+    Fetches and sends information about a specific FTC team.
+    `/ftc <team> refresh` bypasses the response cache.
+    """
+    args = body["text"].split()
+    team_number = args[0] if args else ""
+    team_data = ftc(team_number, force_refresh="refresh" in args[1:])
     if team_data and team_data.get("data") and team_data["data"].get("teamByNumber"):
         team = team_data["data"]["teamByNumber"]
         location = team.get("location", {})
@@ -478,3 +474,60 @@ def send_ftc_team_info(body, client):
             channel=body["channel_id"],
             text=f"Could not find data for team {team_number}",
         )
+
+
+def send_tagged_entries(body, client, limit=10):
+    """
+    Lists the newest entries carrying the given tags.
+    `/tags cad drivetrain` matches any of the tags; add `--all` to require every one.
+    """
+    args = body["text"].replace(",", " ").split()
+    match = "all" if "--all" in args else "any"
+    tags = [arg for arg in args if arg != "--all"]
+    if not tags:
+        text = "Usage: `/tags <tag> [tag ...] [--all]`"
+    else:
+        page = fetch_entries_page(page_size=limit, tags=tags, match=match)
+        lines = [
+            f"*#{entry['id']}* {entry['project'] or 'No project'} - "
+            f"{(entry['data'] or [''])[0][:80]} _({entry['created_at']})_"
+            for entry in page["entries"]
+        ]
+        label = f" {match} of ".join(f"`{tag}`" for tag in tags)
+        if not lines:
+            text = f"No entries tagged {label}."
+        else:
+            more = "\nMore results in the web viewer." if page["next_cursor"] else ""
+            text = f"Entries tagged {label}:\n" + "\n".join(lines) + more
+    client.chat_postEphemeral(
+        channel=body["channel_id"], user=body["user_id"], text=text
+    )
+
+
+def _slack_snippet(snippet):
+    """Escapes a search snippet for mrkdwn and bolds the matched words."""
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+        snippet = snippet.replace(char, entity)
+    return snippet.replace(HIGHLIGHT_START, "*").replace(HIGHLIGHT_STOP, "*")
+
+
+def send_search_results(body, client, limit=10):
+    """Searches the notebook for `/search <words>` and lists the best matches."""
+    query = body["text"].strip()
+    if not query:
+        text = 'Usage: `/search <words>` (use "quotes" for phrases, -word to exclude)'
+    else:
+        results = search_entries(query, limit=limit)
+        lines = [
+            f"*#{entry['id']}* {entry['project'] or 'No project'}: "
+            f"{_slack_snippet(entry['snippet'])}"
+            for entry in results["entries"]
+        ]
+        if not lines:
+            text = f"No entries match `{query}`."
+        else:
+            more = "\nMore results in the web viewer." if results["next_cursor"] else ""
+            text = f"Entries matching `{query}`:\n" + "\n".join(lines) + more
+    client.chat_postEphemeral(
+        channel=body["channel_id"], user=body["user_id"], text=text
+    )
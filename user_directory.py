@@ -0,0 +1,72 @@
+import os
+from cache import TTLCache
+
+# Slack user ID -> real name, shared by every handler in this process.
+_names = TTLCache(
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", 2000)),
+    ttl=int(os.environ.get("USER_CACHE_TTL", 3600)),
+)
+
+
+def _real_name(user):
+    """
+    Pulls the display-worthy name out of a Slack user object, falling back
+    to the display name and then the user ID so there is always one to store.
+    """
+    profile = user.get("profile", {})
+    return (
+        user.get("real_name")
+        or profile.get("real_name")
+        or profile.get("display_name")
+        or user["id"]
+    )
+
+
+def get_real_name(client, user_id):
+    """
+    Returns a user's real name, asking Slack only on a cache miss. If Slack
+    cannot say, the user ID stands in for it (uncached, so it is retried).
+    """
+    name = _names.get(user_id)
+    if name is None:
+        response = client.users_info(user=user_id)
+        if not response["ok"]:
+            return user_id
+        name = _real_name(response["user"])
+        _names.set(user_id, name)
+    return name
+
+
+def get_real_names(client, user_ids):
+    """Returns the real names for a list of user IDs, in the same order."""
+    return [get_real_name(client, uid) for uid in user_ids]
+
+
+def warm_user_directory(client, page_size=200):
+    """Loads every workspace member into the cache using paginated users.list calls."""
+    cursor = None
+    loaded = 0
+    while True:
+        response = client.users_list(cursor=cursor, limit=page_size)
+        for member in response["members"]:
+            if member.get("deleted"):
+                continue
+            _names.set(member["id"], _real_name(member))
+            loaded += 1
+        cursor = response.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+    print(f"Loaded {loaded} Slack users into the user directory cache.")
+    return loaded
+
+
+def update_user(user):
+    """Refreshes a cached user from a user_change event payload."""
+    if user.get("deleted"):
+        _names.delete(user["id"])
+    else:
+        _names.set(user["id"], _real_name(user))
+
+
+def user_cache_stats():
+    return _names.stats()